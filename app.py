@@ -1,3 +1,4 @@
+from backend.core import startup
 import threading
 import webbrowser
 import time
@@ -8,6 +9,13 @@ from backend.config import cap
 from backend.core.camera_manager import initialize_cameras_background
 from backend.routes.api_routes import register_routes
 from backend.handlers.websocket_handlers import register_socketio_handlers, start_update_thread
+from backend.core.device_controller import start_device_reconciler, warm_connection
+from backend.core.gesture_detector import load_hands
+from backend.core.station_monitor import sync_stations
+
+startup.mark("imports")
+
+SERVER_PORT = 5000
 
 def create_app():
     app = Flask(__name__, static_folder='./frontend-vue')
@@ -20,28 +28,47 @@ def create_app():
     
     return app, socketio
 
+def initialize_cameras_and_stations():
+    """Detect cameras, then start monitors for the configured stations"""
+    initialize_cameras_background()
+    sync_stations()
+
+def warm_device_connection():
+    if not warm_connection():
+        raise ConnectionError("ESP8266 did not answer")
+
+def register_startup_resources():
+    """Heavy initialization that runs once the server is already listening"""
+    startup.register_resource("mediapipe_hands", load_hands)
+    startup.register_resource("cameras", initialize_cameras_and_stations, required=False)
+    startup.register_resource("esp8266", warm_device_connection, required=False)
+
 def open_browser():
     time.sleep(1.5)
-    url = 'http://127.0.0.1:5000'
+    url = f'http://127.0.0.1:{SERVER_PORT}'
     print(f"Opening browser at {url}")
     webbrowser.open(url, new=2)
 
 def main():
     try:
         app, socketio = create_app()
+        startup.mark("create app")
         
         start_update_thread(socketio)
+        start_device_reconciler()
         
-        camera_thread = threading.Thread(target=initialize_cameras_background, daemon=True)
-        camera_thread.start()
+        # MediaPipe, camera detection and the ESP8266 warm-up load after the server binds
+        register_startup_resources()
+        startup.start_background_init(port=SERVER_PORT)
         
         browser_thread = threading.Thread(target=open_browser, daemon=True)
         browser_thread.start()
         
-        print("Starting Flask server on http://0.0.0.0:5000")
-        print("Camera detection will happen in background...")
+        print(f"Starting Flask server on http://0.0.0.0:{SERVER_PORT}")
+        print("Hand model, cameras and device connection will load in background (see /api/health)...")
         print("Browser will open automatically...")
-        socketio.run(app, host='0.0.0.0', port=5000, debug=True, use_reloader=False)
+        startup.mark("start threads")
+        socketio.run(app, host='0.0.0.0', port=SERVER_PORT, debug=True, use_reloader=False)
         
     except Exception as e:
         print(f"Error starting server: {e}")
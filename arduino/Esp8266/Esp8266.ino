@@ -1,12 +1,26 @@
 #include <ESP8266WiFi.h>
 #include <ESP8266WebServer.h>
 #include <ESP8266mDNS.h>
+#include <WiFiUdp.h>
 
 const char* ssid = "PROJECTX";
 const char* password = "987654321";
 
 ESP8266WebServer server(80);
 
+// Compact UDP control channel (8-byte frames: "GC" | version | type | seq16 | arg1 | arg2)
+WiFiUDP controlUdp;
+const unsigned int CONTROL_UDP_PORT = 4210;
+const uint8_t FRAME_VERSION = 1;
+const uint8_t FRAME_SET = 0x01;
+const uint8_t FRAME_STATUS = 0x02;
+const uint8_t FRAME_LEVEL = 0x03;   // arg1 = outputs, arg2 = level 0-100
+const uint8_t FRAME_ACK = 0x80;
+const uint8_t OUT_LED1 = 0x01;
+const uint8_t OUT_LED2 = 0x02;
+const uint8_t OUT_MOTOR = 0x04;
+const uint8_t OUT_BUZZER = 0x08;
+
 // Pin Configuration for Transistor Control
 const int led1Pin = D1;      // Red LED (GPIO5) - Direct with 220Ω resistor
 const int led2Pin = D2;      // Green LED (GPIO4) - Direct with 220Ω resistor
@@ -16,15 +30,118 @@ const int motorPin = D6;     // Motor (GPIO12) - Through transistor with 1KΩ ba
 // Motor PWM Configuration (to reduce power consumption and prevent brown-out)
 const int MOTOR_PWM_POWER = 512;  // 50% power (0-1023 range)
 const int BUZZER_PWM_POWER = 767; // 75% power (25% more than motor)
+const int PWM_RANGE = 1023;       // analogWrite range the powers above assume
 
 // State Tracking
 bool led1State = false;
 bool led2State = false;
+bool motorState = false;   // Motor and buzzer are switched together
+bool buzzerState = false;
 
 // Track request performance
 unsigned long lastPerfLog = 0;
 unsigned long requestCount = 0;
 
+// Report actual output states so the backend can reconcile against them
+void sendStatus() {
+  String json = "{\"status\":\"ESP8266 OK\"";
+  json += ",\"led1\":\"";
+  json += led1State ? "ON" : "OFF";
+  json += "\",\"led2\":\"";
+  json += led2State ? "ON" : "OFF";
+  json += "\",\"motor\":\"";
+  json += (motorState || buzzerState) ? "ON" : "OFF";
+  json += "\"}";
+  server.send(200, "application/json", json);
+}
+
+uint8_t outputBits() {
+  uint8_t bits = 0;
+  if (led1State) bits |= OUT_LED1;
+  if (led2State) bits |= OUT_LED2;
+  if (motorState) bits |= OUT_MOTOR;
+  if (buzzerState) bits |= OUT_BUZZER;
+  return bits;
+}
+
+// Set every output selected in mask to the matching bit in values
+void applyOutputs(uint8_t mask, uint8_t values) {
+  if (mask & OUT_LED1) {
+    led1State = values & OUT_LED1;
+    digitalWrite(led1Pin, led1State ? HIGH : LOW);
+  }
+  if (mask & OUT_LED2) {
+    led2State = values & OUT_LED2;
+    digitalWrite(led2Pin, led2State ? HIGH : LOW);
+  }
+  if (mask & OUT_MOTOR) {
+    motorState = values & OUT_MOTOR;
+    analogWrite(motorPin, motorState ? MOTOR_PWM_POWER : 0);
+  }
+  if (mask & OUT_BUZZER) {
+    buzzerState = values & OUT_BUZZER;
+    analogWrite(buzzerPin, buzzerState ? BUZZER_PWM_POWER : 0);
+  }
+}
+
+// Dimming: level 0-100 scaled to each output's PWM ceiling (motor/buzzer keep their brown-out limits)
+void applyLevel(uint8_t mask, int level) {
+  level = constrain(level, 0, 100);
+  if (mask & OUT_LED1) {
+    led1State = level > 0;
+    analogWrite(led1Pin, (long)level * PWM_RANGE / 100);
+  }
+  if (mask & OUT_LED2) {
+    led2State = level > 0;
+    analogWrite(led2Pin, (long)level * PWM_RANGE / 100);
+  }
+  if (mask & OUT_MOTOR) {
+    motorState = level > 0;
+    analogWrite(motorPin, (long)level * MOTOR_PWM_POWER / 100);
+  }
+  if (mask & OUT_BUZZER) {
+    buzzerState = level > 0;
+    analogWrite(buzzerPin, (long)level * BUZZER_PWM_POWER / 100);
+  }
+}
+
+// SET is idempotent, so retransmitted frames are simply applied again and re-acked
+void handleControlUdp() {
+  int size = controlUdp.parsePacket();
+  if (size <= 0) {
+    return;
+  }
+  if (size != 8) {
+    controlUdp.flush();
+    return;
+  }
+
+  unsigned long start = micros();
+  uint8_t frame[8];
+  controlUdp.read(frame, 8);
+  if (frame[0] != 'G' || frame[1] != 'C' || frame[2] != FRAME_VERSION) {
+    return;
+  }
+
+  uint8_t type = frame[3];
+  if (type == FRAME_SET) {
+    applyOutputs(frame[6], frame[7]);
+  } else if (type == FRAME_LEVEL) {
+    applyLevel(frame[6], frame[7]);
+  } else if (type != FRAME_STATUS) {
+    return;
+  }
+
+  frame[3] = type | FRAME_ACK;
+  frame[6] = outputBits();
+  frame[7] = 0;
+  controlUdp.beginPacket(controlUdp.remoteIP(), controlUdp.remotePort());
+  controlUdp.write(frame, 8);
+  controlUdp.endPacket();
+  requestCount++;
+  Serial.printf("[DEBUG] UDP type=0x%02X seq=%u - %luus\n", type, (frame[4] << 8) | frame[5], micros() - start);
+}
+
 void setup() {
   Serial.begin(115200);
   
@@ -37,6 +154,7 @@ void setup() {
   digitalWrite(led2Pin, LOW);
   digitalWrite(buzzerPin, LOW);
   digitalWrite(motorPin, LOW);
+  analogWriteRange(PWM_RANGE);  // core 3.x defaults to 255
   
   WiFi.begin(ssid, password);
   Serial.print("Connecting to WiFi");
@@ -61,7 +179,7 @@ void setup() {
   server.on("/status", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
-    server.send(200, "text/plain", "ESP8266 OK");
+    sendStatus();
     Serial.printf("[DEBUG] /status - %lums\n", millis() - start);
   });
   
@@ -86,6 +204,7 @@ void setup() {
   server.on("/led1/on", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
+    led1State = true;
     digitalWrite(led1Pin, HIGH);
     server.send(200, "text/plain", "LED1 ON");
     Serial.printf("[DEBUG] /led1/on - %lums\n", millis() - start);
@@ -94,6 +213,7 @@ void setup() {
   server.on("/led1/off", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
+    led1State = false;
     digitalWrite(led1Pin, LOW);
     server.send(200, "text/plain", "LED1 OFF");
     Serial.printf("[DEBUG] /led1/off - %lums\n", millis() - start);
@@ -102,6 +222,7 @@ void setup() {
   server.on("/led2/on", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
+    led2State = true;
     digitalWrite(led2Pin, HIGH);
     server.send(200, "text/plain", "LED2 ON");
     Serial.printf("[DEBUG] /led2/on - %lums\n", millis() - start);
@@ -110,6 +231,7 @@ void setup() {
   server.on("/led2/off", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
+    led2State = false;
     digitalWrite(led2Pin, LOW);
     server.send(200, "text/plain", "LED2 OFF");
     Serial.printf("[DEBUG] /led2/off - %lums\n", millis() - start);
@@ -118,6 +240,7 @@ void setup() {
   server.on("/buzzer/on", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
+    buzzerState = true;
     analogWrite(buzzerPin, BUZZER_PWM_POWER);  // PWM at 75% power
     server.send(200, "text/plain", "Buzzer ON (75%)");
     Serial.printf("[DEBUG] /buzzer/on (PWM=%d) - %lums\n", BUZZER_PWM_POWER, millis() - start);
@@ -126,6 +249,7 @@ void setup() {
   server.on("/buzzer/off", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
+    buzzerState = false;
     analogWrite(buzzerPin, 0);  // PWM at 0% = OFF
     server.send(200, "text/plain", "Buzzer OFF");
     Serial.printf("[DEBUG] /buzzer/off - %lums\n", millis() - start);
@@ -134,6 +258,7 @@ void setup() {
   server.on("/motor/on", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
+    motorState = true;
     analogWrite(motorPin, MOTOR_PWM_POWER);  // PWM at 50% power to prevent brown-out
     server.send(200, "text/plain", "Motor ON (50%)");
     Serial.printf("[DEBUG] /motor/on (PWM=%d) - %lums\n", MOTOR_PWM_POWER, millis() - start);
@@ -142,6 +267,7 @@ void setup() {
   server.on("/motor/off", HTTP_GET, [](){
     unsigned long start = millis();
     requestCount++;
+    motorState = false;
     analogWrite(motorPin, 0);  // PWM at 0% = OFF
     server.send(200, "text/plain", "Motor OFF");
     Serial.printf("[DEBUG] /motor/off - %lums\n", millis() - start);
@@ -160,9 +286,11 @@ void setup() {
     if (server.hasArg("led1")) {
       String value = server.arg("led1");
       if (value == "on") {
+        led1State = true;
         digitalWrite(led1Pin, HIGH);
         response += "LED1=ON ";
       } else if (value == "off") {
+        led1State = false;
         digitalWrite(led1Pin, LOW);
         response += "LED1=OFF ";
       }
@@ -173,9 +301,11 @@ void setup() {
     if (server.hasArg("led2")) {
       String value = server.arg("led2");
       if (value == "on") {
+        led2State = true;
         digitalWrite(led2Pin, HIGH);
         response += "LED2=ON ";
       } else if (value == "off") {
+        led2State = false;
         digitalWrite(led2Pin, LOW);
         response += "LED2=OFF ";
       }
@@ -186,9 +316,11 @@ void setup() {
     if (server.hasArg("buzzer")) {
       String value = server.arg("buzzer");
       if (value == "on") {
+        buzzerState = true;
         analogWrite(buzzerPin, BUZZER_PWM_POWER);  // PWM at 75%
         response += "BUZZER=ON(75%) ";
       } else if (value == "off") {
+        buzzerState = false;
         analogWrite(buzzerPin, 0);  // PWM at 0%
         response += "BUZZER=OFF ";
       }
@@ -199,9 +331,11 @@ void setup() {
     if (server.hasArg("motor")) {
       String value = server.arg("motor");
       if (value == "on") {
+        motorState = true;
         analogWrite(motorPin, MOTOR_PWM_POWER);  // PWM at 50%
         response += "MOTOR=ON(50%) ";
       } else if (value == "off") {
+        motorState = false;
         analogWrite(motorPin, 0);  // PWM at 0%
         response += "MOTOR=OFF ";
       }
@@ -212,11 +346,36 @@ void setup() {
     Serial.printf("[DEBUG] /batch (%d commands) - %lums\n", commandCount, millis() - start);
   });
   
+  // PWM levels - newest value only, sent rate limited by the backend
+  // Usage: /pwm?led1=40 (0-100; motor/buzzer are scaled to their power limits)
+  server.on("/pwm", HTTP_GET, [](){
+    unsigned long start = millis();
+    requestCount++;
+    
+    String response = "PWM: ";
+    const char* names[] = {"led1", "led2", "motor", "buzzer"};
+    const uint8_t bits[] = {OUT_LED1, OUT_LED2, OUT_MOTOR, OUT_BUZZER};
+    for (int i = 0; i < 4; i++) {
+      if (server.hasArg(names[i])) {
+        int level = constrain(server.arg(names[i]).toInt(), 0, 100);
+        applyLevel(bits[i], level);
+        response += String(names[i]) + "=" + level + " ";
+      }
+    }
+    
+    server.send(200, "text/plain", response);
+    Serial.printf("[DEBUG] /pwm - %lums\n", millis() - start);
+  });
+  
   server.begin();
   Serial.println("HTTP server started");
+  
+  controlUdp.begin(CONTROL_UDP_PORT);
+  Serial.printf("UDP control channel on port %u\n", CONTROL_UDP_PORT);
 }
 
 void loop() {
+  handleControlUdp();
   server.handleClient();
   MDNS.update();  // Keep mDNS alive
   
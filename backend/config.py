@@ -22,6 +22,32 @@ camera_sources = {"ESP32-CAM": ESP32_CAM_URL}
 # Gesture detection state
 fingers = [0, 0, 0, 0, 0]
 
+# MediaPipe Hands options, shared by the in-process detector and pool workers
+HANDS_OPTIONS = {
+    "static_image_mode": False,
+    "model_complexity": 0,  # 0 = Lite model (faster), 1 = Full model
+    "min_detection_confidence": 0.5,  # Lower = faster detection
+    "min_tracking_confidence": 0.5,  # Lower = faster tracking
+    "max_num_hands": 1,
+}
+
+# Gesture -> device rules (see backend/core/gesture_rules.py), first match wins;
+# editable through settings["gesture_rules"]
+GESTURE_RULES = [
+    {"name": "Closed Fist - All Components OFF", "fingers": 0,
+     "set": {"led1": "OFF", "led2": "OFF", "motor": "OFF"}},
+    {"name": "Open Hand - Red & Green LEDs ON", "fingers": 5,
+     "set": {"led1": "ON", "led2": "ON", "motor": "OFF"}},
+    {"name": "1 Finger - Toggle Red LED", "fingers": 1,
+     "set": {"led1": "TOGGLE"}, "requires": "detect_led1"},
+    {"name": "2 Fingers - Toggle Green LED", "fingers": 2,
+     "set": {"led2": "TOGGLE"}, "requires": "detect_led2"},
+    {"name": "3 Fingers - Motor & Buzzer ON, LEDs OFF", "fingers": 3,
+     "set": {"motor": "ON", "led1": "OFF", "led2": "OFF"}, "requires": "detect_motor"},
+    {"name": "Motor & Buzzer OFF (gesture changed)", "fingers": "*",
+     "set": {"motor": "OFF"}, "requires": "detect_motor"},
+]
+
 # Timing controls
 last_settings_change = 0
 settings_cooldown = 2.0 
@@ -38,17 +64,49 @@ settings = {
     "camera_source": "Computer Cam 0", 
     "gesture_detection_enabled": True,
     "show_landmarks": True,
+    "show_finger_rotation_indicator": False,
+    "show_hand_rotation_indicator": False,
     "processing_scale": 0.5,
     "skip_frames": 1,
+    "roi_tracking": True,
+    "motion_gating": True,
+    "adaptive_quality": False,
+    "target_detection_fps": 10,
+    "detection_latency_budget_ms": 50,
+    "landmark_smoothing": True,
+    "landmark_prediction": True,
+    "landmark_min_cutoff": 0.5,
+    "landmark_beta": 0.02,
+    "alloc_debug": False,
     "gesture_debounce_delay": 0.5,
+    "gesture_confirm_frames": 3,
+    "gesture_confirm_ms": 250,
+    "gesture_hysteresis_frames": 1,
+    "gesture_rules": GESTURE_RULES,
     "motor_update_interval": 0.3,
+    # While on, analog_output follows the hand level and gesture rules skip it
+    "analog_control": False,
+    "analog_source": "hand_angle",
+    "analog_output": "led1",
+    "analog_deadband": 3,
     "detect_all_leds": True,
     "detect_led1": True,
     "detect_led2": True,
     "detect_motor": True,
     "auto_detect_cameras": False,
+    "esp32_native_mjpeg": True,
+    "esp32_reduced_decode": False,
+    "jpeg_passthrough": False,
+    "jpeg_encoder": "auto",
+    "jpeg_subsampling": "420",
+    "jpeg_fast_dct": True,
     "esp32_cam_url": ESP32_CAM_URL,
     "esp8266_ip": ESP8266_IP,    
+    "esp8266_control_protocol": "http",
+    "esp8266_udp_port": 4210,
+    "stations": [],
+    "inference_workers": 0,
+    "station_device_control": False,
 }
 
 # Camera management
@@ -0,0 +1,149 @@
+"""
+Closed-loop control of processing_scale and skip_frames from measured detection latency
+"""
+import time
+import threading
+from collections import deque
+import numpy as np
+from backend.config import settings
+
+# Processing scales the controller moves between, lowest quality first
+SCALE_STEPS = [0.25, 0.35, 0.5, 0.6, 0.75, 1.0]
+MAX_SKIP = 6
+
+class AdaptiveQualityController:
+    """Trades detection resolution and rate against a latency budget and target FPS"""
+
+    def __init__(self, window=60, interval=2.0, min_samples=8, headroom=0.6, up_intervals=2,
+                 max_scale=0.75):
+        self.interval = interval            # seconds between decisions
+        self.min_samples = min_samples      # detections needed before deciding
+        self.headroom = headroom            # p90 below headroom * budget counts as spare capacity
+        self.up_intervals = up_intervals    # consecutive spare intervals before raising quality
+        self.max_scale = max_scale
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._frame_times = deque(maxlen=window * 2)
+        self._detection_times = deque(maxlen=window)
+        self._last_decision = time.time()
+        self._spare_streak = 0
+        self.load_skip = 0                  # extra skip added while even the lowest scale is too slow
+        self.decisions = deque(maxlen=20)
+
+    @property
+    def enabled(self):
+        return settings.get("adaptive_quality", False)
+
+    def record_frame(self):
+        """Count a captured frame (input rate)"""
+        with self._lock:
+            self._frame_times.append(time.time())
+
+    def record_detection(self, elapsed_ms):
+        """Add one detection latency sample and adjust settings when an interval has passed"""
+        now = time.time()
+        with self._lock:
+            self._latencies.append(elapsed_ms)
+            self._detection_times.append(now)
+            if not self.enabled or now - self._last_decision < self.interval:
+                return
+            if len(self._latencies) < self.min_samples:
+                return
+            self._last_decision = now
+            self._decide()
+
+    @staticmethod
+    def _rate(timestamps):
+        if len(timestamps) < 2:
+            return 0.0
+        span = timestamps[-1] - timestamps[0]
+        return (len(timestamps) - 1) / span if span > 0 else 0.0
+
+    def _percentiles(self):
+        if not self._latencies:
+            return None, None
+        p50, p90 = np.percentile(np.fromiter(self._latencies, dtype=np.float64), [50, 90])
+        return float(p50), float(p90)
+
+    def _decide(self):
+        budget = float(settings.get("detection_latency_budget_ms", 50))
+        target_fps = max(0.5, float(settings.get("target_detection_fps", 10)))
+        p50, p90 = self._percentiles()
+        input_fps = self._rate(self._frame_times)
+
+        scale = float(settings.get("processing_scale", 0.5))
+        index = min(range(len(SCALE_STEPS)), key=lambda i: abs(SCALE_STEPS[i] - scale))
+        top = max(i for i, step in enumerate(SCALE_STEPS) if step <= self.max_scale)
+        reason = None
+
+        if p90 > budget:
+            # Over budget: shed resolution first, then detection rate
+            self._spare_streak = 0
+            if index > 0:
+                index -= 1
+                reason = f"p90 {p90:.0f}ms > budget {budget:.0f}ms"
+            elif self.load_skip < MAX_SKIP - 1:
+                self.load_skip += 1
+                reason = f"p90 {p90:.0f}ms > budget {budget:.0f}ms at minimum scale"
+        elif p90 < budget * self.headroom:
+            self._spare_streak += 1
+            if self._spare_streak >= self.up_intervals:
+                self._spare_streak = 0
+                if self.load_skip > 0:
+                    self.load_skip -= 1
+                    reason = f"p90 {p90:.0f}ms has headroom, restoring detection rate"
+                elif index < top:
+                    # Detection cost grows with pixel count; only step up if that still fits
+                    predicted = p90 * (SCALE_STEPS[index + 1] / SCALE_STEPS[index]) ** 2
+                    if predicted < budget * 0.9:
+                        index += 1
+                        reason = f"p90 {p90:.0f}ms has headroom, raising scale (predicted {predicted:.0f}ms)"
+        else:
+            self._spare_streak = 0
+
+        # Only detect as often as the target rate needs
+        rate_skip = max(1, int(input_fps / target_fps)) if input_fps > 0 else 1
+        skip = min(MAX_SKIP, rate_skip + self.load_skip)
+        new_scale = SCALE_STEPS[min(index, top)]
+
+        old_skip = int(settings.get("skip_frames", 1))
+        if new_scale == scale and skip == old_skip:
+            return
+        if reason is None:
+            reason = f"input {input_fps:.1f} fps for target {target_fps:g} fps"
+
+        settings["processing_scale"] = new_scale
+        settings["skip_frames"] = skip
+        # Measure the new configuration from scratch
+        self._latencies.clear()
+        self.decisions.append({
+            "time": round(time.time(), 1),
+            "processing_scale": new_scale,
+            "skip_frames": skip,
+            "p50_ms": round(p50, 1),
+            "p90_ms": round(p90, 1),
+            "input_fps": round(input_fps, 1),
+            "reason": reason,
+        })
+        print(f"[ADAPTIVE] scale {scale:g} → {new_scale:g}, skip {old_skip} → {skip}: {reason}")
+
+    def filter_update(self, update):
+        """Drop keys the controller owns from a settings POST while it stays enabled"""
+        if update.get("adaptive_quality", self.enabled):
+            return {k: v for k, v in update.items() if k not in ("processing_scale", "skip_frames")}
+        return update
+
+    def status(self):
+        with self._lock:
+            p50, p90 = self._percentiles()
+            return {
+                "enabled": self.enabled,
+                "processing_scale": settings.get("processing_scale"),
+                "skip_frames": settings.get("skip_frames"),
+                "load_skip": self.load_skip,
+                "p50_ms": round(p50, 1) if p50 is not None else None,
+                "p90_ms": round(p90, 1) if p90 is not None else None,
+                "input_fps": round(self._rate(self._frame_times), 1),
+                "detection_fps": round(self._rate(self._detection_times), 1),
+                "decisions": list(self.decisions)[-5:],
+            }
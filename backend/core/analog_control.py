@@ -0,0 +1,146 @@
+"""
+Continuous gesture controls: hand rotation or pinch distance -> 0-100 output levels
+
+The level is recomputed every frame, but LevelStreamer only sends it when it
+moved by more than the deadband, at most once per min_interval, and always
+just the newest value, so the ESP8266 never works through a backlog.
+
+While settings["analog_control"] is on, the level owns settings["analog_output"]:
+gesture rules leave that device alone. Any ON/OFF that still reaches it
+(dashboard buttons, reconciler corrections) invalidates the last sent level,
+so the next frame sends the level again.
+"""
+import time
+import threading
+from collections import deque
+import numpy as np
+from backend.core.command_dispatcher import latency_summary
+from backend.core.utils import map_range, validate_voltage
+
+# Reading range mapped onto levels 0-100 for each source
+ANALOG_SOURCES = {
+    "hand_angle": (30.0, 150.0),    # wrist rotation in degrees, 90 = hand upright
+    "finger_angle": (5.0, 60.0),    # index-thumb spread at the wrist in degrees
+    "pinch": (0.15, 0.9),           # thumb-index tip distance / wrist-middle MCP distance
+}
+
+def pinch_ratio(landmarks):
+    """Thumb-index tip distance relative to hand size, so it does not depend on camera distance"""
+    hand_size = np.linalg.norm(landmarks[9, :2] - landmarks[0, :2])
+    if hand_size < 1e-3:
+        return None
+    return float(np.linalg.norm(landmarks[8, :2] - landmarks[4, :2]) / hand_size)
+
+def analog_reading(hand_data, source):
+    """Raw reading for a source from build_hand_data() output, or None"""
+    if source == "pinch":
+        return pinch_ratio(hand_data['landmarks'])
+    return hand_data.get(source)
+
+def reading_to_level(reading, source):
+    """Map a reading onto 0-100"""
+    low, high = ANALOG_SOURCES[source]
+    return validate_voltage(round(map_range(reading, low, high, 0, 100)))
+
+class LevelStreamer:
+    """Sends the newest 0-100 level per output from a worker thread, rate capped and deadbanded"""
+
+    def __init__(self, send_func, min_interval=0.3, deadband=3, on_ack=None):
+        self.send_func = send_func
+        self.min_interval = min_interval    # seconds between sends
+        self.deadband = deadband            # smaller changes are not sent (except reaching 0 or 100)
+        self.on_ack = on_ack
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._in_flight = {}
+        self._sent_levels = {}
+        self._last_send = 0.0
+        self._thread = None
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.suppressed = 0
+        self.send_latency = deque(maxlen=100)
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="level-streamer", daemon=True)
+            self._thread.start()
+        print("[ANALOG] Level streamer started")
+
+    def submit(self, output, level):
+        """Queue a level; returns whether it will be sent"""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        with self._condition:
+            last = self._in_flight.get(output, self._sent_levels.get(output))
+            if last is not None and (level == last or (abs(level - last) < self.deadband and level not in (0, 100))):
+                # Within the deadband of what the device has or is being sent
+                if level != last:
+                    self.suppressed += 1
+                self._pending.pop(output, None)
+                return False
+            if output in self._pending and self._pending[output] != level:
+                # Superseded before it was sent
+                self.coalesced += 1
+            self._pending[output] = level
+            self._condition.notify()
+        return True
+
+    def invalidate(self, device):
+        """The device was switched ON/OFF outside this streamer; the last level no longer applies"""
+        with self._condition:
+            self._sent_levels.pop(device, None)
+            self._in_flight.pop(device, None)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                # Rate cap: later submits replace the pending level while we wait
+                wait = self._last_send + self.min_interval - time.time()
+                while wait > 0:
+                    self._condition.wait(timeout=wait)
+                    wait = self._last_send + self.min_interval - time.time()
+                if not self._pending:
+                    continue
+                levels = self._in_flight = self._pending
+                self._pending = {}
+                self._last_send = time.time()
+
+            start = time.time()
+            try:
+                ok = self.send_func(levels)
+            except Exception as e:
+                print(f"[ANALOG] Send failed: {e}")
+                ok = False
+
+            with self._condition:
+                self._in_flight = {}
+                if ok:
+                    self._sent_levels.update(levels)
+            if ok:
+                self.sent += 1
+                self.send_latency.append((time.time() - start) * 1000)
+                if self.on_ack is not None:
+                    self.on_ack(levels)
+            else:
+                self.failed += 1
+
+    def stats(self):
+        with self._condition:
+            pending = dict(self._pending)
+            levels = dict(self._sent_levels)
+        return {
+            "levels": levels,
+            "pending": pending,
+            "sent": self.sent,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "suppressed": self.suppressed,
+            "min_interval_s": self.min_interval,
+            "deadband": self.deadband,
+            "send_latency": latency_summary(list(self.send_latency)),
+        }
@@ -1,10 +1,260 @@
+import atexit
 import cv2
 import time
 import threading
+from contextlib import contextmanager
+import numpy as np
 from backend.config import (
     camera_sources, camera_detection_lock, camera_detection_in_progress,
     camera_detection_completed, settings, cap
 )
+from backend.core.mjpeg_client import MJPEGStreamReader, reduction_for_scale
+from backend.core.frame_ring import FrameRing
+
+def passthrough_supported(capture):
+    """Whether a capture can hand out the camera's original JPEG bytes"""
+    return hasattr(capture, "read_jpeg")
+
+def jpeg_passthrough_enabled(capture):
+    return settings.get("jpeg_passthrough", False) and passthrough_supported(capture)
+
+# Ring readers: the video pipeline borrows views, read() hands out copies
+READER_PIPELINE = 0
+READER_COPY = 1
+
+class FrameGrabber:
+    """Drains a capture continuously on its own thread and keeps only the newest frame
+    
+    Decoded frames land in a shared-memory FrameRing: the capture writes
+    straight into a free slot and readers borrow the newest slot as a view.
+    """
+    
+    def __init__(self, capture, name, slots=4):
+        self.capture = capture
+        self.name = name
+        self.slots = slots
+        self.ring = None
+        self._old_rings = []
+        self._condition = threading.Condition()
+        self._jpeg = None
+        self._timestamp = 0.0
+        self._seq = 0
+        self._consumed_seq = 0
+        self._failures = 0
+        self._running = False
+        self._thread = None
+        self.frames_grabbed = 0
+        self.frames_skipped = 0
+        self.frames_copied = 0
+    
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"grabber-{self.name}", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=2.0):
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        for ring in self._old_rings + [self.ring]:
+            if ring is not None:
+                ring.close()
+        self._old_rings = []
+        self.ring = None
+    
+    def _store(self, frame):
+        """Copy a frame whose shape does not fit the ring (first frame, resolution change)"""
+        if self.ring is None or self.ring.shape != frame.shape:
+            if self.ring is not None:
+                self._old_rings.append(self.ring)
+            self.ring = FrameRing(frame.shape, slots=self.slots, readers=2)
+        self.ring.write(frame)
+        self.frames_copied += 1
+    
+    def _grab_frame(self):
+        """Read the next frame straight into a free ring slot"""
+        if self.ring is None:
+            ret, frame = self.capture.read()
+            if ret and frame is not None:
+                self._store(frame)
+            return ret and frame is not None
+        
+        index, slot = self.ring.begin_write()
+        ret, frame = self.capture.read(slot)
+        if not ret or frame is None:
+            return False
+        if frame.shape != self.ring.shape:
+            self._store(frame)
+        elif not np.may_share_memory(frame, slot):
+            np.copyto(slot, frame)
+            self.frames_copied += 1
+            self.ring.commit(index)
+        else:
+            self.ring.commit(index)
+        return True
+    
+    def _run(self):
+        while self._running:
+            jpeg = None
+            try:
+                # In passthrough mode keep the camera's JPEG and decode only on demand
+                if jpeg_passthrough_enabled(self.capture):
+                    jpeg = self.capture.read_jpeg()
+                    ret = jpeg is not None
+                else:
+                    ret = self._grab_frame()
+            except Exception as e:
+                print(f"[GRABBER] {self.name} read error: {e}")
+                ret = False
+            
+            with self._condition:
+                if ret:
+                    # Frame nobody picked up before it was replaced
+                    if self._seq > self._consumed_seq:
+                        self.frames_skipped += 1
+                    self._jpeg = jpeg
+                    self._timestamp = time.time()
+                    self._seq += 1
+                    self._failures = 0
+                    self.frames_grabbed += 1
+                else:
+                    self._failures += 1
+                self._condition.notify_all()
+            
+            if not ret:
+                time.sleep(0.05)
+    
+    def _wait(self, last_seq, timeout):
+        """Wait for a frame newer than last_seq; returns (seq, jpeg, timestamp) or None"""
+        if last_seq is None:
+            last_seq = self._consumed_seq
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._seq > last_seq or not self._running, timeout=timeout)
+            if self._seq <= last_seq:
+                return None
+            self._consumed_seq = self._seq
+            return self._seq, self._jpeg, self._timestamp
+    
+    @contextmanager
+    def view(self, last_seq=None, timeout=1.0):
+        """Borrow the newest frame without copying: yields (success, frame, timestamp, seq)
+        
+        The frame is a read-only view into the ring and is only valid inside
+        the with block.
+        """
+        waited = self._wait(last_seq, timeout)
+        if waited is None:
+            yield False, None, 0.0, self._seq
+            return
+        seq, jpeg, timestamp = waited
+        
+        if jpeg is not None:
+            frame = self.capture.decode(jpeg)
+            yield frame is not None, frame, timestamp, seq
+            return
+        
+        ring = self.ring
+        borrowed = ring.acquire(READER_PIPELINE) if ring is not None else None
+        if borrowed is None:
+            yield False, None, 0.0, seq
+            return
+        try:
+            yield True, borrowed[1], timestamp, seq
+        finally:
+            ring.release(READER_PIPELINE)
+    
+    def read(self, last_seq=None, timeout=1.0):
+        """Return (success, frame, timestamp, seq) for a frame newer than last_seq (owned copy)"""
+        waited = self._wait(last_seq, timeout)
+        if waited is None:
+            return False, None, 0.0, self._seq
+        seq, jpeg, timestamp = waited
+        
+        if jpeg is not None:
+            frame = self.capture.decode(jpeg)
+            if frame is None:
+                return False, None, 0.0, seq
+            return True, frame, timestamp, seq
+        
+        ring = self.ring
+        borrowed = ring.acquire(READER_COPY) if ring is not None else None
+        if borrowed is None:
+            return False, None, 0.0, seq
+        try:
+            return True, borrowed[1].copy(), timestamp, seq
+        finally:
+            ring.release(READER_COPY)
+    
+    def read_jpeg(self, last_seq=None, timeout=1.0):
+        """Return (success, jpeg_bytes, timestamp, seq) without decoding"""
+        if last_seq is None:
+            last_seq = self._consumed_seq
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._seq > last_seq or not self._running, timeout=timeout)
+            if self._jpeg is None or self._seq <= last_seq:
+                return False, None, 0.0, self._seq
+            self._consumed_seq = self._seq
+            return True, self._jpeg, self._timestamp, self._seq
+    
+    @property
+    def failures(self):
+        return self._failures
+    
+    def stats(self):
+        return {
+            "seq": self._seq,
+            "grabbed": self.frames_grabbed,
+            "skipped": self.frames_skipped,
+            "failures": self._failures,
+            "copied": self.frames_copied,
+            "frame_age_ms": round((time.time() - self._timestamp) * 1000, 1) if self._timestamp else None,
+        }
+
+# One grabber per open source
+grabbers = {}
+grabbers_lock = threading.Lock()
+# Set at exit so a reconnecting pipeline stage does not reopen a camera behind the cleanup
+shutting_down = False
+
+def start_grabber(capture, name):
+    """Start (or replace) the background grabber for a source"""
+    with grabbers_lock:
+        old = grabbers.pop(name, None)
+        if old is not None:
+            old.stop()
+        grabber = FrameGrabber(capture, name)
+        grabbers[name] = grabber
+        grabber.start()
+        print(f"[GRABBER] Started latest-frame grabber for {name}")
+        return grabber
+
+def stop_grabber(name):
+    with grabbers_lock:
+        grabber = grabbers.pop(name, None)
+    if grabber is not None:
+        grabber.stop()
+
+def stop_all_grabbers():
+    """Stop every grabber and unlink its shared-memory rings; registered to run at exit"""
+    global shutting_down
+    with grabbers_lock:
+        shutting_down = True
+        stopping = list(grabbers.values())
+        grabbers.clear()
+    for grabber in stopping:
+        grabber.stop()
+
+atexit.register(stop_all_grabbers)
+
+def get_grabber_stats():
+    return {name: grabber.stats() for name, grabber in list(grabbers.items())}
+
+# Source name of the capture held in cap
+current_cap_name = None
 
 def get_camera_sources():
     esp32_url = settings.get("esp32_cam_url", "http://10.168.182.148:81/stream")
@@ -19,6 +269,10 @@ def get_camera_sources():
     
     return sources
 
+def get_camera_source(name):
+    """URL/index of a named camera from the latest detection results"""
+    return camera_sources.get(name)
+
 def detect_cameras():
     global camera_sources, camera_detection_completed, camera_detection_in_progress
     
@@ -68,33 +322,64 @@ def initialize_cameras_background():
         import traceback
         traceback.print_exc()
 
+def open_mjpeg_stream(url):
+    """Open the ESP32-CAM stream with the built-in MJPEG client"""
+    reduction = 1
+    if settings.get("esp32_reduced_decode", False):
+        reduction = reduction_for_scale(settings.get("processing_scale", 0.5))
+    reader = MJPEGStreamReader(url, timeout=5.0, reduction=reduction)
+    if reader.open():
+        return reader
+    return None
+
+def get_decode_scale():
+    """Scale of decoded frames relative to the camera's native resolution"""
+    reduction = getattr(cap, "reduction", 1)
+    return 1.0 / reduction
+
+def create_capture(source, name):
+    """Open a capture for a source without making it the active camera"""
+    if name == "ESP32-CAM" and settings.get("esp32_native_mjpeg", True) \
+            and isinstance(source, str) and source.startswith("http://"):
+        capture = open_mjpeg_stream(source)
+        if capture is None:
+            print("[MJPEG] Falling back to FFMPEG capture")
+            capture = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    elif name == "ESP32-CAM":
+        capture = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+        capture.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, 5000)
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        capture.set(cv2.CAP_PROP_BRIGHTNESS, 0.5)
+        capture.set(cv2.CAP_PROP_CONTRAST, 0.5)
+        capture.set(cv2.CAP_PROP_SATURATION, 0.55)
+    else:
+        capture = cv2.VideoCapture(source, cv2.CAP_DSHOW)
+        if not capture.isOpened():
+            capture = cv2.VideoCapture(source)
+        
+        if isinstance(source, int) and capture.isOpened():
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            capture.set(cv2.CAP_PROP_FPS, 30)
+            capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    return capture
+
 def open_camera(source, current_source):
-    global cap
+    global cap, current_cap_name
+    
+    if shutting_down:
+        return False
     
     try:
-        if current_source == "ESP32-CAM":
-            cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
-            cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, 5000)
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-            cap.set(cv2.CAP_PROP_BRIGHTNESS, 0.5)
-            cap.set(cv2.CAP_PROP_CONTRAST, 0.5)
-            cap.set(cv2.CAP_PROP_SATURATION, 0.55)
-        else:
-            cap = cv2.VideoCapture(source, cv2.CAP_DSHOW)
-            if not cap.isOpened():
-                cap = cv2.VideoCapture(source)
-            
-            if isinstance(source, int) and cap.isOpened():
-                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                cap.set(cv2.CAP_PROP_FPS, 30)
-                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        cap = create_capture(source, current_source)
         
         if cap is not None and cap.isOpened():
             ret, _ = cap.read()
             if ret:
                 print(f"Camera {current_source} opened successfully")
+                current_cap_name = current_source
+                start_grabber(cap, current_source)
                 return True
             else:
                 print(f"Camera {current_source} opened but cannot read frames")
@@ -111,7 +396,12 @@ def open_camera(source, current_source):
         return False
 
 def release_camera():
-    global cap
+    global cap, current_cap_name
+    
+    # Stop the grabber before releasing so it is not mid-read
+    if current_cap_name is not None:
+        stop_grabber(current_cap_name)
+        current_cap_name = None
     
     if cap is not None:
         try:
@@ -124,12 +414,56 @@ def release_camera():
 def is_camera_open():
     return cap is not None and cap.isOpened()
 
-def read_frame():
+def read_latest_frame(last_seq=None, timeout=1.0):
+    """Return (success, frame, capture_timestamp, seq) of the newest grabbed frame"""
+    grabber = grabbers.get(current_cap_name) if current_cap_name is not None else None
+    if grabber is None:
+        success, frame = read_frame_direct()
+        return success, frame, time.time(), 0
+    return grabber.read(last_seq, timeout)
+
+@contextmanager
+def latest_frame_view(last_seq=None, timeout=1.0):
+    """Borrow the newest grabbed frame as a read-only view: yields (success, frame, timestamp, seq)"""
+    grabber = grabbers.get(current_cap_name) if current_cap_name is not None else None
+    if grabber is None:
+        success, frame = read_frame_direct()
+        yield success, frame, time.time(), 0
+        return
+    with grabber.view(last_seq, timeout) as result:
+        yield result
+
+def is_passthrough_active():
+    """True when the current source delivers undecoded JPEG frames"""
+    return cap is not None and current_cap_name in grabbers and jpeg_passthrough_enabled(cap)
+
+def read_latest_jpeg(last_seq=None, timeout=1.0):
+    """Return (success, jpeg_bytes, capture_timestamp, seq) of the newest grabbed frame"""
+    grabber = grabbers.get(current_cap_name) if current_cap_name is not None else None
+    if grabber is None:
+        return False, None, 0.0, 0
+    return grabber.read_jpeg(last_seq, timeout)
+
+def read_frame(image=None):
+    """Newest frame; with image, it is written into that buffer (e.g. a FrameRing slot)"""
+    if current_cap_name not in grabbers:
+        return read_frame_direct(image)
+    if image is None:
+        success, frame, _, _ = read_latest_frame()
+        return success, frame
+    with latest_frame_view() as (success, frame, _, _):
+        if success and frame.shape == image.shape:
+            np.copyto(image, frame)
+            return True, image
+        return success, frame.copy() if success else None
+
+def read_frame_direct(image=None):
+    """Read straight from the capture, bypassing the grabber; decodes into image when given"""
     if cap is None:
         return False, None
     
     try:
-        return cap.read()
+        return cap.read(image) if image is not None else cap.read()
     except Exception as e:
         print(f"Error reading frame: {e}")
         return False, None
\ No newline at end of file
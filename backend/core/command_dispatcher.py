@@ -0,0 +1,160 @@
+"""
+Non-blocking device command dispatcher with per-device coalescing
+"""
+import time
+import threading
+from collections import deque
+from functools import lru_cache
+from urllib.parse import urlencode
+from backend.config import device_status
+
+# Hardware outputs driven by each logical device
+DEVICE_OUTPUTS = {
+    "led1": ["led1"],
+    "led2": ["led2"],
+    "motor": ["motor", "buzzer"],
+}
+
+def build_batch_path(states):
+    """Build the ESP8266 /batch path for a {device: "ON"/"OFF"} dict"""
+    return batch_path(tuple(states.items()))
+
+@lru_cache(maxsize=128)
+def batch_path(items):
+    """/batch path for ((device, state), ...); there are only a few dozen combinations, so each is built once"""
+    params = {}
+    for device, state in items:
+        for output in DEVICE_OUTPUTS.get(device, [device]):
+            params[output] = "on" if state == "ON" else "off"
+    return f"/batch?{urlencode(params)}"
+
+def build_level_path(levels):
+    """Build the ESP8266 /pwm path for a {device: 0-100} dict"""
+    params = {}
+    for device, level in levels.items():
+        for output in DEVICE_OUTPUTS.get(device, [device]):
+            params[output] = int(level)
+    return f"/pwm?{urlencode(params)}"
+
+def latency_summary(samples):
+    """Average, p95 and max of a sample window in milliseconds"""
+    if not samples:
+        return {"avg_ms": None, "p95_ms": None, "max_ms": None, "count": 0}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "avg_ms": round(sum(ordered) / len(ordered), 1),
+        "p95_ms": round(p95, 1),
+        "max_ms": round(ordered[-1], 1),
+        "count": len(ordered),
+    }
+
+class CommandDispatcher:
+    """Sends the newest desired device states from a worker thread so callers never block"""
+
+    def __init__(self, send_func, idle_func=None, idle_interval=5.0, on_ack=None):
+        self.send_func = send_func
+        self.on_ack = on_ack
+        self.idle_func = idle_func
+        self.idle_interval = idle_interval
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._in_flight = {}
+        self._enqueued_at = {}
+        self._thread = None
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.queue_latency = deque(maxlen=100)
+        self.command_latency = deque(maxlen=100)
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="command-dispatcher", daemon=True)
+            self._thread.start()
+        print("[DISPATCH] Command dispatcher started")
+
+    def submit(self, states):
+        """Queue desired {device: "ON"/"OFF"} states and return immediately"""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        now = time.time()
+        with self._condition:
+            for device, state in states.items():
+                if device in self._pending:
+                    # Superseded before it was sent
+                    self.coalesced += 1
+                else:
+                    self._enqueued_at[device] = now
+                self._pending[device] = state
+            self._condition.notify()
+
+    def pending_state(self, device):
+        """State queued or being sent for a device but not yet acknowledged, or None"""
+        with self._condition:
+            return self._pending.get(device, self._in_flight.get(device))
+
+    def desired_state(self, device):
+        """Pending state if one is queued, otherwise the last acknowledged state"""
+        with self._condition:
+            return self._pending.get(device, device_status.get(device, "OFF"))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(lambda: self._pending, timeout=self.idle_interval):
+                    batch = None
+                else:
+                    batch = self._pending
+                    enqueued_at = self._enqueued_at
+                    self._in_flight = batch
+                    self._pending = {}
+                    self._enqueued_at = {}
+
+            if batch is None:
+                if self.idle_func is not None:
+                    try:
+                        self.idle_func()
+                    except Exception:
+                        pass
+                continue
+
+            send_start = time.time()
+            oldest = min(enqueued_at.values())
+            self.queue_latency.append((send_start - oldest) * 1000)
+
+            try:
+                ok = self.send_func(batch)
+            except Exception as e:
+                print(f"[DISPATCH] Send failed: {e}")
+                ok = False
+
+            if ok:
+                acked = time.time()
+                device_status.update(batch)
+                if self.on_ack is not None:
+                    self.on_ack(batch)
+
+            with self._condition:
+                self._in_flight = {}
+
+            if ok:
+                self.sent += 1
+                self.command_latency.append((acked - oldest) * 1000)
+                print(f"[DISPATCH] {build_batch_path(batch)} acknowledged in {(acked - oldest) * 1000:.1f}ms")
+            else:
+                self.failed += 1
+
+    def stats(self):
+        with self._condition:
+            pending = dict(self._pending)
+        return {
+            "pending": pending,
+            "sent": self.sent,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "queue_latency": latency_summary(list(self.queue_latency)),
+            "command_latency": latency_summary(list(self.command_latency)),
+        }
@@ -0,0 +1,176 @@
+"""
+Compact UDP control protocol for the ESP8266 (HTTP stays as fallback)
+
+Every datagram is 8 bytes:
+    magic "GC" | version | type | seq (uint16, big endian) | arg1 | arg2
+
+    SET    (0x01): arg1 = mask of outputs to change, arg2 = their on/off bits
+    STATUS (0x02): no arguments
+    LEVEL  (0x03): arg1 = mask of outputs to dim, arg2 = level 0-100 (PWM)
+Replies echo the seq with type | 0x80; arg1 carries the current output bits.
+"""
+import socket
+import struct
+import threading
+import time
+from backend.core.command_dispatcher import DEVICE_OUTPUTS
+
+MAGIC = b"GC"
+VERSION = 1
+FRAME = struct.Struct(">2sBBHBB")
+
+TYPE_SET = 0x01
+TYPE_STATUS = 0x02
+TYPE_LEVEL = 0x03
+TYPE_ACK = 0x80
+
+DEFAULT_PORT = 4210
+
+# Output bit positions shared with the sketch
+OUTPUT_BITS = {"led1": 0x01, "led2": 0x02, "motor": 0x04, "buzzer": 0x08}
+
+def encode_frame(frame_type, seq, arg1=0, arg2=0):
+    return FRAME.pack(MAGIC, VERSION, frame_type, seq & 0xFFFF, arg1 & 0xFF, arg2 & 0xFF)
+
+def decode_frame(data):
+    """Return (type, seq, arg1, arg2) or None for anything that is not a valid frame"""
+    if len(data) != FRAME.size:
+        return None
+    magic, version, frame_type, seq, arg1, arg2 = FRAME.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return frame_type, seq, arg1, arg2
+
+def states_to_bits(states):
+    """Convert {device: "ON"/"OFF"} to (mask, values) output bits"""
+    mask = values = 0
+    for device, state in states.items():
+        for output in DEVICE_OUTPUTS.get(device, [device]):
+            bit = OUTPUT_BITS.get(output, 0)
+            mask |= bit
+            if state == "ON":
+                values |= bit
+    return mask, values
+
+def bits_to_states(bits):
+    """Convert reported output bits to {device: "ON"/"OFF"}"""
+    return {
+        "led1": "ON" if bits & OUTPUT_BITS["led1"] else "OFF",
+        "led2": "ON" if bits & OUTPUT_BITS["led2"] else "OFF",
+        "motor": "ON" if bits & (OUTPUT_BITS["motor"] | OUTPUT_BITS["buzzer"]) else "OFF",
+    }
+
+class UdpControlChannel:
+    """Sequenced request/ack client over a single UDP socket"""
+
+    def __init__(self, get_address, get_port=lambda: DEFAULT_PORT, ack_timeout=0.05, retries=2,
+                 retry_after=30.0, max_failures=3):
+        self.get_address = get_address
+        self.get_port = get_port
+        self.ack_timeout = ack_timeout
+        self.retries = retries
+        self.retry_after = retry_after
+        self.max_failures = max_failures
+        self._lock = threading.Lock()
+        self._sock = None
+        self._address = None
+        self._port = None
+        self._seq = 0
+        self.consecutive_failures = 0
+        self.disabled_until = 0.0
+        self.sent = 0
+        self.acked = 0
+        self.retransmits = 0
+        self.last_rtt_ms = None
+
+    @property
+    def available(self):
+        """False while backing off after repeated unanswered requests"""
+        return time.time() >= self.disabled_until
+
+    def _socket(self):
+        address = self.get_address()
+        port = int(self.get_port())
+        if self._sock is None or (address, port) != (self._address, self._port):
+            if self._sock is not None:
+                self._sock.close()
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.connect((address, port))
+            self._address = address
+            self._port = port
+        return self._sock
+
+    def _transact(self, frame_type, arg1=0, arg2=0):
+        """Send one frame and wait for its ack, retransmitting on timeout"""
+        with self._lock:
+            self._seq = (self._seq + 1) & 0xFFFF
+            seq = self._seq
+            frame = encode_frame(frame_type, seq, arg1, arg2)
+            try:
+                sock = self._socket()
+            except OSError as e:
+                print(f"[UDP] Socket error: {e}")
+                return self._failed()
+
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    self.retransmits += 1
+                start = time.time()
+                try:
+                    sock.send(frame)
+                    self.sent += 1
+                    deadline = start + self.ack_timeout
+                    while True:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            break
+                        sock.settimeout(remaining)
+                        reply = decode_frame(sock.recv(64))
+                        # Ignore late acks for earlier sequence numbers
+                        if reply and reply[0] == (frame_type | TYPE_ACK) and reply[1] == seq:
+                            self.last_rtt_ms = (time.time() - start) * 1000
+                            self.acked += 1
+                            self.consecutive_failures = 0
+                            return reply[2]
+                except socket.timeout:
+                    continue
+                except OSError:
+                    # ICMP port unreachable surfaces here on connected sockets
+                    time.sleep(self.ack_timeout)
+                    continue
+            return self._failed()
+
+    def _failed(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.max_failures:
+            self.disabled_until = time.time() + self.retry_after
+            print(f"[UDP] No acks from device, using HTTP for {self.retry_after:.0f}s")
+            self.consecutive_failures = 0
+        return None
+
+    def send_states(self, states):
+        """Apply {device: "ON"/"OFF"} states; returns reported states or None"""
+        mask, values = states_to_bits(states)
+        bits = self._transact(TYPE_SET, mask, values)
+        return None if bits is None else bits_to_states(bits)
+
+    def send_level(self, device, level):
+        """Set a device's PWM level (0-100); returns reported states or None"""
+        mask, _ = states_to_bits({device: "ON"})
+        bits = self._transact(TYPE_LEVEL, mask, max(0, min(100, int(level))))
+        return None if bits is None else bits_to_states(bits)
+
+    def query_status(self):
+        bits = self._transact(TYPE_STATUS)
+        return None if bits is None else bits_to_states(bits)
+
+    def stats(self):
+        return {
+            "address": self._address,
+            "port": self._port,
+            "available": self.available,
+            "sent": self.sent,
+            "acked": self.acked,
+            "retransmits": self.retransmits,
+            "last_rtt_ms": round(self.last_rtt_ms, 2) if self.last_rtt_ms is not None else None,
+        }
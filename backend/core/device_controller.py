@@ -1,66 +1,41 @@
 import time
+import json
 import urllib3
-import socket
 from urllib.parse import urlencode
-from backend.config import device_status, get_esp8266_ip, settings
+from backend.config import device_status, get_esp8266_ip, settings, GESTURE_RULES
+from backend.core.command_dispatcher import CommandDispatcher, build_batch_path, build_level_path
+from backend.core.device_reconciler import DeviceReconciler
+from backend.core.device_transport import DeviceTransport
+from backend.core.control_channel import UdpControlChannel, DEFAULT_PORT
+from backend.core.gesture_state import GestureStateMachine
+from backend.core.gesture_rules import compile_rules
+from backend.core.analog_control import ANALOG_SOURCES, LevelStreamer, analog_reading, reading_to_level
 
-# This keeps connections alive aggressively and reuses them
-http_pool = None
-_resolved_esp_ip = None
+# Single keep-alive transport shared by gesture control, the REST route and status polling
+device_transport = DeviceTransport(get_esp8266_ip, port=80, pool_size=3)
 
-def resolve_hostname(hostname):
-    """Resolve mDNS hostname to IP address once and cache it"""
-    global _resolved_esp_ip
-    if _resolved_esp_ip is None:
-        try:
-            print(f"[DNS] Resolving {hostname}...")
-            resolved = socket.gethostbyname(hostname)
-            _resolved_esp_ip = resolved
-            print(f"[DNS] Resolved {hostname} → {resolved}")
-        except socket.gaierror as e:
-            print(f"[DNS ERROR] Failed to resolve {hostname}: {e}")
-            _resolved_esp_ip = hostname
-    return _resolved_esp_ip
-
-def get_http_pool():
-    """Get or create HTTP connection pool"""
-    global http_pool
-    if http_pool is None:
-        hostname = get_esp8266_ip()
-        esp_ip = resolve_hostname(hostname)
-        
-        http_pool = urllib3.HTTPConnectionPool(
-            host=esp_ip,
-            port=80,
-            maxsize=1,
-            block=False,
-            timeout=urllib3.Timeout(connect=3.0, read=0.1),
-            retries=False,
-            headers={'Connection': 'keep-alive'}
-        )
-        print(f"[CONNECTION] Created connection pool to {esp_ip}")
-    return http_pool
+# Optional low-overhead UDP control channel; HTTP remains the fallback
+udp_channel = UdpControlChannel(device_transport.current_address,
+                                get_port=lambda: settings.get("esp8266_udp_port", DEFAULT_PORT))
+
+def udp_channel_enabled():
+    return settings.get("esp8266_control_protocol", "http") == "udp" and udp_channel.available
 
 # Timeout for requests
 REQUEST_TIMEOUT = urllib3.Timeout(connect=3.0, read=0.1)
 
-# Connection warming - establish connection on module load
+# Connection warming - run by the startup thread once the server is up
 def warm_connection():
-    """Pre-establish TCP connection to ESP8266"""
+    """Pre-establish TCP connection to ESP8266; returns whether it answered"""
     try:
-        pool = get_http_pool()
-        pool.request('GET', '/status', timeout=urllib3.Timeout(connect=2.0, read=2.0))
-        print(f"[CONNECTION] Warmed up connection to {pool.host}")
+        device_transport.request('GET', '/status', timeout=urllib3.Timeout(connect=2.0, read=2.0))
+        print(f"[CONNECTION] Warmed up connection to {device_transport.get_pool().host}")
+        return True
     except Exception as e:
         print(f"[WARNING] Could not warm connection: {e}")
-
-try:
-    warm_connection()
-except:
-    pass
+        return False
 
 # Debouncing
-last_state_change = {}
 debounce_delay = 1.0
 
 # Keep-alive ping
@@ -73,21 +48,111 @@ def keepalive_ping():
     current = time.time()
     if current - last_keepalive > keepalive_interval:
         try:
-            pool = get_http_pool()
-            pool.request('GET', '/status', timeout=REQUEST_TIMEOUT)
+            device_transport.request('GET', '/status', timeout=REQUEST_TIMEOUT)
             last_keepalive = current
         except:
             pass 
 
-state_buffer = {
-    "all_leds": [],
-    "led1": [],
-    "led2": [],
-    "motor": []
-}
-confirmation_frames = 5
+def send_batch(states):
+    """Send desired device states in one /batch request (runs on the dispatcher thread)"""
+    global last_keepalive
+    if udp_channel_enabled():
+        if udp_channel.send_states(states) is not None:
+            return True
+        print("[UDP] SET not acknowledged, retrying over HTTP")
+    
+    path = build_batch_path(states)
+    try:
+        response = device_transport.request('GET', path, timeout=REQUEST_TIMEOUT)
+        last_keepalive = time.time()
+        return response.status == 200
+    except Exception as e:
+        print(f"[ERROR] {path} failed: {e}")
+        return False
+
+def send_levels(levels):
+    """Send {device: 0-100} PWM levels (runs on the level streamer thread)"""
+    global last_keepalive
+    if udp_channel_enabled():
+        if all(udp_channel.send_level(device, level) is not None for device, level in levels.items()):
+            return True
+        print("[UDP] LEVEL not acknowledged, retrying over HTTP")
+    
+    path = build_level_path(levels)
+    try:
+        response = device_transport.request('GET', path, timeout=REQUEST_TIMEOUT)
+        last_keepalive = time.time()
+        return response.status == 200
+    except Exception as e:
+        print(f"[ERROR] {path} failed: {e}")
+        return False
+
+def fetch_device_status():
+    """Read the relay states reported by the ESP8266 /status endpoint"""
+    global last_keepalive
+    if udp_channel_enabled():
+        reported = udp_channel.query_status()
+        if reported is not None:
+            return reported
+    
+    try:
+        response = device_transport.request('GET', '/status', timeout=urllib3.Timeout(connect=1.0, read=0.5))
+        last_keepalive = time.time()
+        data = json.loads(response.data.decode('utf-8'))
+    except Exception:
+        # Unreachable, or older firmware answering "ESP8266 OK" without states
+        return None
+    
+    return {device: data[device] for device in device_status if data.get(device) in ("ON", "OFF")}
+
+# Gesture commands are queued here so the frame loop never waits on the ESP8266
+command_dispatcher = CommandDispatcher(send_batch, idle_func=keepalive_ping, idle_interval=keepalive_interval)
+
+# Desired vs. reported device state; only differences are sent
+device_reconciler = DeviceReconciler(command_dispatcher, fetch_device_status)
 
-last_total_fingers = 0
+def record_levels(levels):
+    """A dimmed output is ON; tell the reconciler so it does not switch it back"""
+    device_reconciler.record_applied({device: "ON" if level > 0 else "OFF" for device, level in levels.items()})
+
+# Continuous levels bypass the ON/OFF dispatcher: newest value only, rate capped
+level_streamer = LevelStreamer(send_levels, on_ack=record_levels)
+
+def record_batch_ack(states):
+    """A /batch was acknowledged: the reconciler learns the states, and PWM levels on those devices are void"""
+    device_reconciler.record_ack(states)
+    for device in states:
+        level_streamer.invalidate(device)
+
+command_dispatcher.on_ack = record_batch_ack
+
+def analog_owned_device():
+    """Device driven by continuous levels, which gesture rules must not switch"""
+    if settings.get("analog_control", False):
+        return settings.get("analog_output", "led1")
+    return None
+
+def set_device_states(states):
+    """Request device states; returns the subset that actually needs sending"""
+    device_reconciler.start()
+    return device_reconciler.set_desired(states)
+
+# Finger patterns -> device states, compiled from settings["gesture_rules"]
+gesture_rules = compile_rules(settings.get("gesture_rules", GESTURE_RULES), settings)
+
+def create_gesture_state():
+    """Gesture state machine configured from settings (one per camera source)"""
+    state = GestureStateMachine(retrigger_seconds=debounce_delay, values=gesture_rules.values)
+    configure_gesture_state(state)
+    return state
+
+def configure_gesture_state(state, values=None):
+    state.configure(settings.get("gesture_confirm_frames", 3),
+                    settings.get("gesture_confirm_ms", 250) / 1000.0,
+                    settings.get("gesture_hysteresis_frames", 1), values)
+
+# Gesture state of the main video stream; extra stations keep their own
+gesture_state = create_gesture_state()
 
 def control_device_direct(device, action):
     """Control device - motor controls both motor and buzzer together"""
@@ -97,23 +162,22 @@ def control_device_direct(device, action):
         print(f"Unknown device: {device}")
         return False
     
-    pool = get_http_pool()
     print(f"\n[DEBUG {time.strftime('%H:%M:%S.%f')[:-3]}] Control Request: {device} -> {action}")
         
     try:
         if device == "motor":
             req1_start = time.time()
-            pool.request('GET', f'/buzzer/{action}', timeout=REQUEST_TIMEOUT)
+            device_transport.request('GET', f'/buzzer/{action}', timeout=REQUEST_TIMEOUT)
             req1_time = (time.time() - req1_start) * 1000
             print(f"  ├─ Buzzer request: {req1_time:.1f}ms")
             
             req2_start = time.time()
-            pool.request('GET', f'/motor/{action}', timeout=REQUEST_TIMEOUT)
+            device_transport.request('GET', f'/motor/{action}', timeout=REQUEST_TIMEOUT)
             req2_time = (time.time() - req2_start) * 1000
             print(f"  ├─ Motor request: {req2_time:.1f}ms")
         else:
             req_start = time.time()
-            response = pool.request('GET', f'/{device}/{action}', timeout=REQUEST_TIMEOUT)
+            response = device_transport.request('GET', f'/{device}/{action}', timeout=REQUEST_TIMEOUT)
             req_time = (time.time() - req_start) * 1000
             print(f"  ├─ {device} request: {req_time:.1f}ms (status: {response.status})")
         
@@ -137,130 +201,98 @@ def control_device_direct(device, action):
         print(f"  └─ ⚠ ERROR after {elapsed:.1f}ms: {e}\n")
         return False
 
-def control_devices_by_gesture(total_fingers):
-    global last_total_fingers
+def control_devices_by_gesture(fingers, state=None):
+    """Feed one frame's finger states; sends commands when a gesture rule is confirmed"""
+    state = state or gesture_state
     
     if not settings.get("detect_all_leds", True):
         return
     
-    keepalive_ping()
-    
     gesture_start = time.time()
-    current_time = time.time()
-    
-    gesture_keys = {
-        0: "fist",
-        1: "one_finger",
-        2: "two_fingers",
-        3: "three_fingers",
-        5: "open_hand"
-    }
-    
-    device_key = gesture_keys.get(total_fingers, f"gesture_{total_fingers}")
-    
-    if device_key not in state_buffer:
-        state_buffer[device_key] = []
+    table = gesture_rules
+    configure_gesture_state(state, table.values)
+    index = state.observe(table.lookup(fingers), gesture_start)
+    if index is None:
+        return
     
-    state_buffer[device_key].append(total_fingers)
+    rule = table.rule(index)
+    if rule is None or not rule.enabled:
+        state.record_command()
+        return
+    states = rule.target_states(device_reconciler.desired_state)
+    owned = analog_owned_device()
+    if owned in states:
+        states = {device: s for device, s in states.items() if device != owned}
+        if not states:
+            state.record_command()
+            return
+    print(f"[GESTURE] {rule.name}: {', '.join(f'{d}={s}' for d, s in states.items())}")
+    set_device_states(states)
     
-    if len(state_buffer[device_key]) > confirmation_frames:
-        state_buffer[device_key].pop(0)
+    latency = state.record_command()
+    gesture_time = (time.time() - gesture_start) * 1000
+    print(f"[TIMING] Gesture queued in {gesture_time:.2f}ms ({latency:.0f}ms after its first frame)")
+
+def control_devices_by_level(hand_data):
+    """Map hand rotation or pinch onto a 0-100 level for settings["analog_output"]"""
+    source = settings.get("analog_source", "hand_angle")
+    output = settings.get("analog_output", "led1")
+    if source not in ANALOG_SOURCES or output not in device_status:
+        return None
     
-    # Only trigger if we have enough frames and they're all the same
-    if len(state_buffer[device_key]) == confirmation_frames:
-        if all(f == total_fingers for f in state_buffer[device_key]):
-            if total_fingers != last_total_fingers:
-                last_change = last_state_change.get(device_key, 0)
-                if current_time - last_change >= debounce_delay:
-                    
-                    if total_fingers == 0:
-                        print("[GESTURE] Closed Fist - All Components OFF")
-                        try:
-                            pool = get_http_pool()
-                            pool.request('GET', '/batch?led1=off&led2=off&motor=off&buzzer=off', timeout=REQUEST_TIMEOUT)
-                            device_status["led1"] = "OFF"
-                            device_status["led2"] = "OFF"
-                            device_status["motor"] = "OFF"
-                        except Exception as e:
-                            print(f"[ERROR] Turn all off failed: {e}")
-                            pass
-                    
-                    elif total_fingers == 5:
-                        print("[GESTURE] Open Hand - Red & Green LEDs ON")
-                        try:
-                            pool = get_http_pool()
-                            pool.request('GET', '/batch?led1=on&led2=on', timeout=REQUEST_TIMEOUT)
-                            device_status["led1"] = "ON"
-                            device_status["led2"] = "ON"
-                            device_status["motor"] = "OFF"
-                        except Exception as e:
-                            print(f"[ERROR] Turn LEDs on failed: {e}")
-                            pass
-                    
-                    elif total_fingers == 1:
-                        if settings.get("detect_led1", True):
-                            current_state = device_status.get("led1", "OFF")
-                            new_state = "OFF" if current_state == "ON" else "ON"
-                            action = "on" if new_state == "ON" else "off"
-                            print(f"[GESTURE] 1 Finger - Toggle Red LED: {new_state}")
-                            try:
-                                pool = get_http_pool()
-                                pool.request('GET', f'/led1/{action}', timeout=REQUEST_TIMEOUT)
-                                device_status["led1"] = new_state
-                            except Exception as e:
-                                print(f"[ERROR] LED1 request failed: {e}")
-                                pass
-                    
-                    elif total_fingers == 2:
-                        if settings.get("detect_led2", True):
-                            current_state = device_status.get("led2", "OFF")
-                            new_state = "OFF" if current_state == "ON" else "ON"
-                            action = "on" if new_state == "ON" else "off"
-                            print(f"[GESTURE] 2 Fingers - Toggle Green LED: {new_state}")
-                            try:
-                                pool = get_http_pool()
-                                pool.request('GET', f'/led2/{action}', timeout=REQUEST_TIMEOUT)
-                                device_status["led2"] = new_state
-                            except Exception as e:
-                                print(f"[ERROR] LED2 request failed: {e}")
-                                pass
-                    
-                    elif total_fingers == 3:
-                        if settings.get("detect_motor", True):
-                            print("[GESTURE] 3 Fingers - Motor & Buzzer ON, LEDs OFF")
-                            try:
-                                pool = get_http_pool()
-                                pool.request('GET', '/batch?motor=on&buzzer=on&led1=off&led2=off', timeout=REQUEST_TIMEOUT)
-                                device_status["motor"] = "ON"
-                                device_status["led1"] = "OFF"
-                                device_status["led2"] = "OFF"
-                            except Exception as e:
-                                print(f"[ERROR] 3-finger gesture failed: {e}")
-                                pass
-                    
-                    else:
-                        if settings.get("detect_motor", True) and device_status.get("motor") == "ON":
-                            print("[GESTURE] Motor & Buzzer OFF (gesture changed)")
-                            try:
-                                pool = get_http_pool()
-                                pool.request('GET', '/batch?motor=off&buzzer=off', timeout=REQUEST_TIMEOUT)
-                                device_status["motor"] = "OFF"
-                            except Exception as e:
-                                print(f"[ERROR] Motor & Buzzer off request failed: {e}")
-                                pass
-                    
-                    last_state_change[device_key] = current_time
-                    last_total_fingers = total_fingers
-                    for key in state_buffer:
-                        state_buffer[key].clear()
-                    
-                    gesture_time = (time.time() - gesture_start) * 1000
-                    print(f"[TIMING] Gesture {total_fingers} execution: {gesture_time:.1f}ms")
+    reading = analog_reading(hand_data, source)
+    if reading is None:
+        return None
+    level = reading_to_level(reading, source)
+    level_streamer.min_interval = settings.get("motor_update_interval", 0.3)
+    level_streamer.deadband = settings.get("analog_deadband", 3)
+    level_streamer.submit(output, level)
+    return level
+
+def get_level_stats():
+    stats = level_streamer.stats()
+    stats["source"] = settings.get("analog_source", "hand_angle")
+    stats["output"] = settings.get("analog_output", "led1")
+    return stats
+
+def reload_gesture_rules(rules=None, flags=None):
+    """Compile rules (default: settings) and swap them in; raises ValueError and keeps the old ones on bad rules"""
+    global gesture_rules
+    table = compile_rules(settings.get("gesture_rules", GESTURE_RULES) if rules is None else rules,
+                          settings if flags is None else flags)
+    gesture_rules = table
+    print(f"[GESTURE] {len(table.rules)} gesture rules loaded")
+    return table
+
+def gesture_rules_affected(update):
+    """Whether a settings update changes the rules or a flag one of them requires"""
+    return "gesture_rules" in update or any(rule.requires in update for rule in gesture_rules.rules)
+
+def get_gesture_stats():
+    stats = gesture_state.stats()
+    rule = gesture_rules.rule(stats["active"]) if stats["active"] is not None else None
+    stats["active_rule"] = rule.name if rule else None
+    stats.update(gesture_rules.describe())
+    return stats
+
+def get_dispatcher_stats():
+    return command_dispatcher.stats()
+
+def get_reconciler_stats():
+    return device_reconciler.stats()
+
+def get_transport_stats():
+    stats = device_transport.stats()
+    stats["protocol"] = settings.get("esp8266_control_protocol", "http")
+    stats["udp"] = udp_channel.stats()
+    return stats
+
+def start_device_reconciler():
+    device_reconciler.start()
 
 def test_esp8266_connection(ip=None):
     try:
-        pool = get_http_pool()
-        response = pool.request('GET', '/status', timeout=urllib3.Timeout(connect=2.0, read=2.0))
+        device_transport.request('GET', '/status', timeout=urllib3.Timeout(connect=2.0, read=2.0))
         return True, "Connected successfully"
     except urllib3.exceptions.TimeoutError:
         return False, "Connection timeout"
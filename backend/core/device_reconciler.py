@@ -0,0 +1,131 @@
+"""
+Desired-state reconciliation between the backend and the ESP8266 relays
+"""
+import time
+import threading
+from backend.config import device_status
+
+class DeviceReconciler:
+    """Tracks desired vs. reported state per device and sends only the difference"""
+
+    def __init__(self, dispatcher, fetch_status, min_interval=0.5, max_interval=10.0):
+        self.dispatcher = dispatcher
+        self.fetch_status = fetch_status
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.desired = {}
+        self.reported = {}
+        self.last_poll = 0.0
+        self.polls = 0
+        self.poll_failures = 0
+        self.corrections = 0
+        self.skipped = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="device-reconciler", daemon=True)
+            self._thread.start()
+        print("[RECONCILE] Device reconciler started")
+
+    def set_desired(self, states):
+        """Record desired {device: "ON"/"OFF"} states and queue only those that differ"""
+        with self._condition:
+            self.desired.update(states)
+            diff = {device: state for device, state in states.items()
+                    if self.needs_send(device, state)}
+            # Re-check the device soon after every change
+            self.interval = self.min_interval
+            self._condition.notify()
+
+        if diff:
+            self.dispatcher.submit(diff)
+        else:
+            self.skipped += 1
+        return diff
+
+    def needs_send(self, device, state):
+        """A state must be sent unless it is already queued or already reported"""
+        pending = self.dispatcher.pending_state(device)
+        if pending is not None:
+            return pending != state
+        return self.reported.get(device) != state
+
+    def desired_state(self, device):
+        with self._condition:
+            if device in self.desired:
+                return self.desired[device]
+        return self.dispatcher.desired_state(device)
+
+    def record_ack(self, states):
+        """The ESP8266 acknowledged a batch, so it now reports these states"""
+        with self._condition:
+            self.reported.update(states)
+
+    def record_applied(self, states):
+        """States the device reached outside the dispatcher (e.g. PWM levels); adopt them without sending"""
+        with self._condition:
+            self.desired.update(states)
+            self.reported.update(states)
+        device_status.update(states)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                changed = self._condition.wait(timeout=self.interval)
+            if changed:
+                # Give the dispatcher a moment to deliver before checking
+                time.sleep(self.min_interval)
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"[RECONCILE] Error: {e}")
+
+    def reconcile(self):
+        """Poll /status once and resend whatever drifted from the desired state"""
+        self.last_poll = time.time()
+        self.polls += 1
+        reported = self.fetch_status()
+
+        with self._condition:
+            if reported is None:
+                self.poll_failures += 1
+                self.interval = min(self.interval * 2, self.max_interval)
+                return None
+
+            self.reported.update(reported)
+            device_status.update(reported)
+
+            # Adopt the hardware state for devices nobody has asked for yet
+            for device, state in reported.items():
+                self.desired.setdefault(device, state)
+
+            diff = {device: state for device, state in self.desired.items()
+                    if device in reported and self.needs_send(device, state)}
+
+            if diff:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * 2, self.max_interval)
+
+        if diff:
+            self.corrections += 1
+            print(f"[RECONCILE] Device drifted, resending {diff}")
+            self.dispatcher.submit(diff)
+        return diff
+
+    def stats(self):
+        with self._condition:
+            return {
+                "desired": dict(self.desired),
+                "reported": dict(self.reported),
+                "poll_interval_s": round(self.interval, 2),
+                "polls": self.polls,
+                "poll_failures": self.poll_failures,
+                "corrections": self.corrections,
+                "skipped_requests": self.skipped,
+            }
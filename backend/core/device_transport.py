@@ -0,0 +1,185 @@
+"""
+Shared HTTP transport to the ESP8266 with cached name resolution and health tracking
+"""
+import time
+import socket
+import threading
+import urllib3
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = [5, 10, 20, 50, 100, 200, 500, 1000, float("inf")]
+
+def split_host_port(value, default_port):
+    """Split "host" or "host:port" (e.g. a local stand-in on 127.0.0.1:8080)"""
+    host, sep, port = str(value).strip().rpartition(":")
+    if sep and host and port.isdigit():
+        return host, int(port)
+    return str(value).strip(), default_port
+
+class LatencyHistogram:
+    """Fixed-bucket request latency histogram"""
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total_ms = 0.0
+        self.count = 0
+
+    def record(self, elapsed_ms):
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.counts[i] += 1
+                break
+        self.total_ms += elapsed_ms
+        self.count += 1
+
+    def to_dict(self):
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            label = f"<={bound:g}ms" if bound != float("inf") else ">1000ms"
+            buckets[label] = count
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "buckets": buckets,
+        }
+
+class DeviceTransport:
+    """One keep-alive connection pool used by every caller that talks to the device"""
+
+    def __init__(self, get_host, port=80, pool_size=3, dns_ttl=60.0,
+                 timeout=urllib3.Timeout(connect=3.0, read=0.1)):
+        self.get_host = get_host
+        self.port = port
+        self.pool_size = pool_size
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._resolve_lock = threading.Lock()
+        self._pool = None
+        self._hostname = None
+        self._address = None
+        self._pool_port = None
+        self._resolved = None
+        self._resolved_at = 0.0
+        self.consecutive_failures = 0
+        self.last_success = None
+        self.last_failure = None
+        self.last_error = None
+        self.resolutions = 0
+        self.histograms = {}
+
+    def _cached_address(self, hostname):
+        if (hostname == self._hostname and self._resolved is not None
+                and time.time() - self._resolved_at < self.dns_ttl):
+            return self._resolved
+        return None
+
+    def resolve(self, hostname, force=False):
+        """Resolve the (mDNS) hostname, reusing the cached address until the TTL expires
+        
+        The lookup can take seconds, so it runs outside self._lock: requests
+        recording their health and stats() never wait on DNS. _resolve_lock
+        only keeps concurrent callers from resolving the same name twice.
+        """
+        if not force:
+            with self._lock:
+                address = self._cached_address(hostname)
+            if address is not None:
+                return address
+        with self._resolve_lock:
+            with self._lock:
+                # Another caller may have resolved it while we waited
+                address = None if force else self._cached_address(hostname)
+                fallback = self._resolved if hostname == self._hostname and self._resolved else hostname
+            if address is not None:
+                return address
+            try:
+                print(f"[DNS] Resolving {hostname}...")
+                address = socket.gethostbyname(hostname)
+                print(f"[DNS] Resolved {hostname} → {address}")
+            except socket.gaierror as e:
+                print(f"[DNS ERROR] Failed to resolve {hostname}: {e}")
+                # Keep the last known address rather than dropping the connection
+                address = fallback
+            with self._lock:
+                self._hostname = hostname
+                self._resolved = address
+                self._resolved_at = time.time()
+                self.resolutions += 1
+            return address
+
+    def current_address(self):
+        """Resolved address of the configured host (cached), without any port"""
+        host, _ = split_host_port(self.get_host(), self.port)
+        return self.resolve(host)
+
+    def get_pool(self):
+        """Return the pool, recreating it when the host or its address changes"""
+        host, port = split_host_port(self.get_host(), self.port)
+        address = self.resolve(host)
+        with self._lock:
+            if self._pool is None or address != self._address or port != self._pool_port:
+                if self._pool is not None:
+                    self._pool.close()
+                self._address = address
+                self._pool_port = port
+                self._pool = urllib3.HTTPConnectionPool(
+                    host=address,
+                    port=port,
+                    maxsize=self.pool_size,
+                    block=True,
+                    timeout=self.timeout,
+                    retries=False,
+                    headers={'Connection': 'keep-alive'}
+                )
+                print(f"[CONNECTION] Created connection pool to {address}:{port} (size {self.pool_size})")
+            return self._pool
+
+    def request(self, method, path, timeout=None):
+        """Send a request, recording latency and connection health"""
+        pool = self.get_pool()
+        start = time.time()
+        try:
+            response = pool.request(method, path, timeout=timeout or self.timeout,
+                                    pool_timeout=1.0)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success(path, (time.time() - start) * 1000)
+        return response
+
+    def _record_success(self, path, elapsed_ms):
+        key = "/" + path.lstrip("/").split("?")[0].split("/")[0]
+        with self._lock:
+            self.histograms.setdefault(key, LatencyHistogram()).record(elapsed_ms)
+            self.consecutive_failures = 0
+            self.last_success = time.time()
+
+    def _record_failure(self, error):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_failure = time.time()
+            self.last_error = str(error)
+            # The device may have a new address; resolve again on the next request
+            if self.consecutive_failures >= 3:
+                self._resolved_at = 0.0
+
+    @property
+    def healthy(self):
+        return self.last_success is not None and self.consecutive_failures == 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "host": self._hostname,
+                "address": self._address,
+                "port": self._pool_port,
+                "pool_size": self.pool_size,
+                "healthy": self.healthy,
+                "consecutive_failures": self.consecutive_failures,
+                "last_success": self.last_success,
+                "last_failure": self.last_failure,
+                "last_error": self.last_error,
+                "dns_resolutions": self.resolutions,
+                "latency": {path: h.to_dict() for path, h in self.histograms.items()},
+            }
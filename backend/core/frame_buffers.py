@@ -0,0 +1,180 @@
+"""
+Reusable destination buffers for the per-frame OpenCV calls, plus an allocation debug counter
+"""
+import gc
+import threading
+import tracemalloc
+import numpy as np
+
+class BufferPool:
+    """Named scratch arrays handed to OpenCV as dst= so the hot loop stops allocating
+
+    get() hands out `depth` flat backing buffers per name in rotation, for
+    scratch results that are used up before the next call. Backings grow to
+    the largest shape requested and smaller shapes get a contiguous view, so
+    ROI crops of varying size reuse memory.
+
+    acquire()/release() are for frames that travel between threads: a
+    buffer is only handed out again after its holder released it. When all
+    `depth` buffers of a name are held, acquire() returns a fresh array
+    outside the pool (counted as an overflow) instead of overwriting one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backings = {}
+        self._next = {}
+        self._free = {}
+        self._owned = {}
+        self._held = {}
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.reuses = 0
+        self.overflows = 0
+
+    def get(self, name, shape, dtype=np.uint8, depth=1):
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        with self._lock:
+            backings = self._backings.setdefault(name, [None] * depth)
+            index = self._next.get(name, 0) % len(backings)
+            self._next[name] = index + 1
+            backing = backings[index]
+            if backing is None or backing.dtype != dtype or backing.size < size:
+                backing = np.empty(size, dtype=dtype)
+                backings[index] = backing
+                self.allocations += 1
+                self.allocated_bytes += backing.nbytes
+            else:
+                self.reuses += 1
+        return backing[:size].reshape(shape)
+
+    def acquire(self, name, shape, dtype=np.uint8, depth=1):
+        """Buffer no other holder has; give it back with release()"""
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        with self._lock:
+            free = self._free.setdefault(name, [])
+            backing = free.pop() if free else None
+            if backing is not None and (backing.dtype != dtype or backing.size < size):
+                # Too small for this frame: replace it with one that fits
+                self._owned[name] -= 1
+                backing = None
+            if backing is None:
+                if self._owned.get(name, 0) >= depth:
+                    self.overflows += 1
+                    return np.empty(shape, dtype=dtype)
+                backing = np.empty(size, dtype=dtype)
+                self._owned[name] = self._owned.get(name, 0) + 1
+                self.allocations += 1
+                self.allocated_bytes += backing.nbytes
+            else:
+                self.reuses += 1
+            self._held[id(backing)] = (name, backing)
+        return backing[:size].reshape(shape)
+
+    def release(self, array):
+        """Return an acquire()d buffer to its pool; overflow arrays are left to the GC"""
+        backing = array if array.base is None else array.base
+        with self._lock:
+            entry = self._held.pop(id(backing), None)
+            if entry is not None:
+                self._free[entry[0]].append(entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._backings.clear()
+            self._next.clear()
+            self._free.clear()
+            self._owned.clear()
+            self._held.clear()
+
+    def stats(self):
+        with self._lock:
+            held = sum(b.nbytes for backings in self._backings.values() for b in backings if b is not None)
+            held += sum(b.nbytes for free in self._free.values() for b in free)
+            held += sum(b.nbytes for _, b in self._held.values())
+            in_use = len(self._held)
+        return {
+            "allocations": self.allocations,
+            "allocated_kb": round(self.allocated_bytes / 1024, 1),
+            "reuses": self.reuses,
+            "held_kb": round(held / 1024, 1),
+            "in_use": in_use,
+            "overflows": self.overflows,
+        }
+
+class AllocationCounter:
+    """Per-frame allocation pressure from tracemalloc, sampled once per frame while enabled
+
+    Tracing slows every allocation in the process, so this only runs while
+    settings["alloc_debug"] is on. Bytes are the traced high-water mark
+    above the level at the previous frame (memory allocated and freed again
+    within a frame still shows up), pool allocations the buffers the pool
+    had to create instead of reusing, and gen0 collections how often
+    allocation pressure triggered the cycle collector.
+    """
+
+    def __init__(self, pool=None, smoothing=0.9):
+        self.pool = pool
+        self.smoothing = smoothing
+        self._tracing = False
+        self._last_current = 0
+        self._last_gen0 = 0
+        self._last_pool_allocations = 0
+        self.frames = 0
+        self.peak_bytes = 0.0
+        self.gen0_collections = 0.0
+        self.pool_allocations = 0.0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._tracing = True
+        self.frames = 0
+        self.peak_bytes = self.gen0_collections = self.pool_allocations = 0.0
+        self._last_current, _ = tracemalloc.get_traced_memory()
+        self._last_gen0 = gc.get_stats()[0]["collections"]
+        self._last_pool_allocations = self.pool.allocations if self.pool is not None else 0
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def sample(self, enabled):
+        """Call once per frame; starts or stops tracing to follow the setting"""
+        if not enabled:
+            self.stop()
+            return
+        if not self._tracing:
+            self.start()
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        gen0 = gc.get_stats()[0]["collections"]
+        pool_allocations = self.pool.allocations if self.pool is not None else 0
+        k = self.smoothing if self.frames else 0.0
+        self.peak_bytes = self.peak_bytes * k + max(0, peak - self._last_current) * (1 - k)
+        self.gen0_collections = self.gen0_collections * k + (gen0 - self._last_gen0) * (1 - k)
+        self.pool_allocations = (self.pool_allocations * k
+                                 + (pool_allocations - self._last_pool_allocations) * (1 - k))
+        self._last_current = current
+        self._last_gen0 = gen0
+        self._last_pool_allocations = pool_allocations
+        self.frames += 1
+
+    def stats(self):
+        if not self._tracing:
+            return {"enabled": False}
+        current, _ = tracemalloc.get_traced_memory()
+        return {
+            "enabled": True,
+            "frames": self.frames,
+            "peak_kb_per_frame": round(self.peak_bytes / 1024, 1),
+            "pool_allocations_per_frame": round(self.pool_allocations, 3),
+            "gen0_collections_per_frame": round(self.gen0_collections, 3),
+            "traced_kb": round(current / 1024, 1),
+        }
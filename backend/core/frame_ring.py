@@ -0,0 +1,133 @@
+"""
+Fixed-size ring of preallocated frame slots in shared memory
+
+One writer fills slots in place (e.g. cap.read(image=slot)) and commits
+them with a sequence number; readers in any process pin the newest slot
+and use it as a numpy view without copying. The writer never reuses the
+newest slot or a pinned one, so with slots >= readers + 2 there is always
+a free slot to write into.
+
+Layout of the segment (all int64/float64, then the frames):
+    latest_seq | latest_index | pin[readers] | slot_seq[slots] | timestamp[slots] | frames
+"""
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+WRITING = -1
+UNPINNED = -1
+
+class FrameRing:
+    """Single-writer, multi-reader latest-frame ring backed by multiprocessing.shared_memory"""
+
+    def __init__(self, shape, slots=4, readers=2, dtype=np.uint8, name=None):
+        if slots < readers + 2:
+            raise ValueError("FrameRing needs at least readers + 2 slots")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.readers = readers
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+
+        control_len = 2 + readers + slots
+        header_bytes = 8 * (control_len + slots)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * frame_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        buf = self.shm.buf
+        self._control = np.ndarray((control_len,), dtype=np.int64, buffer=buf)
+        self._pins = self._control[2:2 + readers]
+        self._slot_seq = self._control[2 + readers:]
+        self._timestamps = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=8 * control_len)
+        self._frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=buf, offset=header_bytes)
+        self._next = 0
+
+        if self.owner:
+            self._control[:2] = (0, -1)
+            self._pins[:] = UNPINNED
+            self._slot_seq[:] = 0
+            self._timestamps[:] = 0.0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def spec(self):
+        """Everything another process needs to attach: FrameRing(**ring.spec())"""
+        return {"name": self.name, "shape": self.shape, "slots": self.slots,
+                "readers": self.readers, "dtype": self.dtype.str}
+
+    @property
+    def latest_seq(self):
+        return int(self._control[0])
+
+    # --- writer side ---
+
+    def begin_write(self):
+        """Claim a free slot; returns (index, writable view)"""
+        latest = int(self._control[1])
+        for _ in range(2 * self.slots):
+            index = self._next
+            self._next = (self._next + 1) % self.slots
+            if index == latest or index in self._pins:
+                continue
+            self._slot_seq[index] = WRITING
+            # A reader may have pinned it between the check and the mark
+            if index in self._pins:
+                continue
+            return index, self._frames[index]
+        raise RuntimeError("FrameRing has no free slot")
+
+    def commit(self, index, timestamp=None):
+        """Publish a filled slot as the newest frame; returns its sequence number"""
+        seq = int(self._control[0]) + 1
+        self._timestamps[index] = time.time() if timestamp is None else timestamp
+        self._slot_seq[index] = seq
+        self._control[1] = index
+        self._control[0] = seq
+        return seq
+
+    def write(self, frame, timestamp=None):
+        """Copy a frame in (for producers that cannot fill a slot directly)"""
+        index, slot = self.begin_write()
+        np.copyto(slot, frame)
+        return self.commit(index, timestamp)
+
+    # --- reader side ---
+
+    def acquire(self, reader, last_seq=0):
+        """Pin the newest slot if it is newer than last_seq; returns (seq, view, timestamp) or None"""
+        for _ in range(4):
+            index = int(self._control[1])
+            if index < 0:
+                return None
+            seq = int(self._slot_seq[index])
+            if seq == WRITING:
+                continue
+            if seq <= last_seq:
+                return None
+            self._pins[reader] = index
+            # Still the frame we saw, not reclaimed by the writer meanwhile
+            if int(self._slot_seq[index]) == seq:
+                view = self._frames[index]
+                view.flags.writeable = False
+                return seq, view, float(self._timestamps[index])
+            self._pins[reader] = UNPINNED
+        return None
+
+    def release(self, reader):
+        self._pins[reader] = UNPINNED
+
+    def close(self):
+        # Drop our views before closing the mapping
+        self._control = self._pins = self._slot_seq = self._timestamps = self._frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Someone still holds a slot view; the mapping goes away when it is collected
+            pass
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,141 @@
+"""
+Declarative gesture-to-device rules compiled into a lookup table
+
+A rule matches a hand either by finger count ("fingers": 0-5 or "*") or by
+a per-finger mask ("mask": thumb..pinky as "0"/"1"/"x", e.g. "01100" for
+index + middle). The first matching rule wins. "set" maps devices to
+"ON", "OFF" or "TOGGLE"; "requires" names a settings flag (such as
+detect_motor) that must be on for the rule to act.
+
+compile_rules() evaluates every rule against all 32 finger masks once, so
+the per-frame path is a mask lookup; the /batch paths for the rule's
+fixed states are built up front. The rules live in settings["gesture_rules"]
+(defaults in config.GESTURE_RULES).
+"""
+from itertools import combinations
+from backend.core.command_dispatcher import DEVICE_OUTPUTS, batch_path
+
+FINGER_NAMES = ("thumb", "index", "middle", "ring", "pinky")
+FINGER_MASKS = 1 << len(FINGER_NAMES)
+RULE_STATES = ("ON", "OFF", "TOGGLE")
+
+def fingers_mask(fingers):
+    """Bit mask (thumb = bit 0) of a detect_fingers-style [thumb, index, middle, ring, pinky] list"""
+    mask = 0
+    for bit, raised in enumerate(fingers):
+        if raised:
+            mask |= 1 << bit
+    return mask
+
+def mask_matcher(pattern):
+    """(care bits, required bits) for a "01x10"-style pattern"""
+    pattern = str(pattern).strip().lower()
+    if len(pattern) != len(FINGER_NAMES) or any(c not in "01x" for c in pattern):
+        raise ValueError(f"mask must be {len(FINGER_NAMES)} characters of 0/1/x (thumb..pinky), got '{pattern}'")
+    care = required = 0
+    for bit, c in enumerate(pattern):
+        if c != "x":
+            care |= 1 << bit
+            if c == "1":
+                required |= 1 << bit
+    return care, required
+
+def rule_matches(rule, mask):
+    if "mask" in rule:
+        care, required = mask_matcher(rule["mask"])
+        return mask & care == required
+    fingers = rule.get("fingers", "*")
+    return fingers == "*" or bin(mask).count("1") == int(fingers)
+
+class CompiledRule:
+    """One rule with its states split into fixed values and toggles"""
+
+    def __init__(self, index, rule, flags):
+        self.index = index
+        self.name = str(rule.get("name") or f"rule {index}")
+        self.requires = rule.get("requires")
+        self.enabled = bool(flags.get(self.requires, True)) if self.requires else True
+        self.fixed = {}
+        self.toggles = []
+        for device, state in (rule.get("set") or {}).items():
+            state = str(state).upper()
+            if device not in DEVICE_OUTPUTS:
+                raise ValueError(f"{self.name}: unknown device '{device}'")
+            if state not in RULE_STATES:
+                raise ValueError(f"{self.name}: state for {device} must be one of {', '.join(RULE_STATES)}")
+            if state == "TOGGLE":
+                self.toggles.append(device)
+            else:
+                self.fixed[device] = state
+        self.path = batch_path(tuple(self.fixed.items())) if self.fixed else None
+
+    def target_states(self, desired_state):
+        """States to request, with toggles resolved against desired_state(device)"""
+        if not self.toggles:
+            return self.fixed
+        states = dict(self.fixed)
+        for device in self.toggles:
+            states[device] = "OFF" if desired_state(device) == "ON" else "ON"
+        return states
+
+    def warm_paths(self):
+        """Build the /batch path of every subset the reconciler may send for this rule"""
+        devices = list(self.fixed) + self.toggles
+        for size in range(1, len(devices) + 1):
+            for subset in combinations(devices, size):
+                for toggled in ("ON", "OFF"):
+                    batch_path(tuple((d, self.fixed.get(d, toggled)) for d in subset))
+
+    def describe(self):
+        return {"name": self.name, "enabled": self.enabled, "set": {**self.fixed, **{d: "TOGGLE" for d in self.toggles}},
+                "requires": self.requires, "path": self.path}
+
+class RuleTable:
+    """Compiled rules plus the finger mask -> rule index table"""
+
+    def __init__(self, rules, table):
+        self.rules = rules
+        self.table = table
+        # Masks no rule matches get their own index, which never acts
+        self.values = len(rules) + 1
+
+    def lookup(self, fingers):
+        """Rule index for a finger list; len(rules) when nothing matched"""
+        return self.table[fingers_mask(fingers)]
+
+    def rule(self, index):
+        return self.rules[index] if index < len(self.rules) else None
+
+    def describe(self):
+        return {
+            "rules": [rule.describe() for rule in self.rules],
+            "unmatched_masks": sum(1 for index in self.table.values() if index == len(self.rules)),
+        }
+
+def compile_rules(rules, flags):
+    """Validate rule dicts and build a RuleTable; raises ValueError on bad rules"""
+    if not isinstance(rules, list):
+        raise ValueError("gesture_rules must be a list")
+    compiled = []
+    for index, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            raise ValueError(f"rule {index} must be an object")
+        if "mask" in rule and "fingers" in rule:
+            raise ValueError(f"rule {index}: use either fingers or mask, not both")
+        if "mask" in rule:
+            mask_matcher(rule["mask"])
+        elif rule.get("fingers", "*") != "*":
+            try:
+                fingers = int(rule["fingers"])
+            except (TypeError, ValueError):
+                raise ValueError(f"rule {index}: fingers must be 0-{len(FINGER_NAMES)} or '*'")
+            if not 0 <= fingers <= len(FINGER_NAMES):
+                raise ValueError(f"rule {index}: fingers must be 0-{len(FINGER_NAMES)} or '*'")
+        compiled.append(CompiledRule(index, rule, flags))
+
+    table = {}
+    for mask in range(FINGER_MASKS):
+        table[mask] = next((i for i, rule in enumerate(rules) if rule_matches(rule, mask)), len(compiled))
+    for rule in compiled:
+        rule.warm_paths()
+    return RuleTable(compiled, table)
@@ -0,0 +1,132 @@
+"""
+Streaming debounce of per-frame finger counts into confirmed gestures
+"""
+import time
+from collections import deque
+import numpy as np
+
+# Finger counts 0-5 by default; anything outside the value range is clamped
+FINGER_VALUES = 6
+
+class GestureStateMachine:
+    """O(1)-amortized gesture confirmation over a time window of recent values
+
+    Values are finger counts by default, or indices into the compiled
+    gesture rules when created with values=len(rules).
+
+    The history holds (timestamp, value) for the last confirm_seconds (and
+    at least confirm_frames entries) with a running count per value, and
+    drops entries by age rather than by number. A value is confirmed once
+    it has been in the history continuously for confirm_seconds with at
+    least confirm_frames votes and at most hysteresis_frames other votes per
+    confirm_frames of its own. The active gesture's votes count as other
+    votes, so it is released once it has (nearly) aged out of the history;
+    the tolerance is a share rather than a count, so it does not shrink at
+    higher FPS. Both the
+    hold and the release are measured in time, so the debounce takes about
+    the same wall time at 8 or 30 FPS; confirm_frames is only the minimum
+    evidence.
+
+    observe() takes an optional timestamp, so synthetic sequences can be
+    replayed deterministically.
+    """
+
+    def __init__(self, confirm_frames=3, confirm_seconds=0.25, hysteresis_frames=1,
+                 retrigger_seconds=1.0, max_gap_seconds=0.5, values=FINGER_VALUES):
+        self.retrigger_seconds = retrigger_seconds  # same gesture can't fire again sooner
+        self.max_gap_seconds = max_gap_seconds      # a longer detection gap starts over
+        self.values = None
+        self.active = None
+        self.decisions = 0
+        self.latencies_ms = deque(maxlen=50)
+        self.command_latencies_ms = deque(maxlen=50)
+        self._pending_since = None
+        self._history = deque()
+        self.configure(confirm_frames, confirm_seconds, hysteresis_frames, values)
+
+    def configure(self, confirm_frames, confirm_seconds, hysteresis_frames, values=None):
+        """Change the thresholds; everything restarts when the value range changes"""
+        self.confirm_frames = max(1, int(confirm_frames))
+        self.hysteresis_frames = max(0, int(hysteresis_frames))
+        self.confirm_seconds = max(0.0, float(confirm_seconds))
+        values = self.values if values is None else max(1, int(values))
+        if values != self.values:
+            # Values mean something else now (e.g. reloaded gesture rules)
+            self.values = values
+            self.reset()
+
+    def clear(self):
+        """Forget the recent frames (the active gesture is kept)"""
+        self._history.clear()
+        self._counts = [0] * self.values
+        self._first_seen = [0.0] * self.values
+        self._last_seen = None
+
+    def reset(self):
+        self.clear()
+        self.active = None
+        self._last_trigger = [float("-inf")] * self.values
+
+    def observe(self, gesture, now=None):
+        """Feed one frame's gesture value; returns the gesture confirmed by this frame, or None"""
+        now = time.time() if now is None else now
+        value = min(max(int(gesture), 0), self.values - 1)
+        if self._last_seen is not None and now - self._last_seen > self.max_gap_seconds:
+            self.clear()
+        self._last_seen = now
+
+        history = self._history
+        counts = self._counts
+        if counts[value] == 0:
+            self._first_seen[value] = now
+        counts[value] += 1
+        history.append((now, value))
+        # Drop votes older than the window, keeping at least confirm_frames of them
+        oldest = now - self.confirm_seconds
+        while len(history) > self.confirm_frames and history[0][0] < oldest:
+            counts[history.popleft()[1]] -= 1
+
+        if value == self.active or counts[value] < self.confirm_frames:
+            return None
+        if now - self._first_seen[value] < self.confirm_seconds:
+            return None
+        if (len(history) - counts[value]) * self.confirm_frames > self.hysteresis_frames * counts[value]:
+            # Hysteresis: too many other votes, which include the active gesture's
+            return None
+        if now - self._last_trigger[value] < self.retrigger_seconds:
+            return None
+
+        self.active = value
+        self._last_trigger[value] = now
+        self.decisions += 1
+        self._pending_since = self._first_seen[value]
+        self.latencies_ms.append((now - self._pending_since) * 1000)
+        return value
+
+    def record_command(self, now=None):
+        """The confirmed gesture's command was queued; records first frame → command latency"""
+        if self._pending_since is None:
+            return None
+        now = time.time() if now is None else now
+        latency = (now - self._pending_since) * 1000
+        self.command_latencies_ms.append(latency)
+        self._pending_since = None
+        return latency
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return None
+        p50, p90 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 90])
+        return {"p50_ms": round(float(p50), 1), "p90_ms": round(float(p90), 1), "count": len(samples)}
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "decisions": self.decisions,
+            "confirm_frames": self.confirm_frames,
+            "confirm_ms": round(self.confirm_seconds * 1000),
+            "hysteresis_frames": self.hysteresis_frames,
+            "decision_latency": self._summary(self.latencies_ms),
+            "command_latency": self._summary(self.command_latencies_ms),
+        }
@@ -0,0 +1,75 @@
+"""
+Vectorized hand landmark features on a (21, 3) float32 array
+"""
+import numpy as np
+
+# Rows: index..pinky fingers; columns: tip, dip, pip, mcp landmark indices
+FINGER_JOINTS = np.array([
+    [8, 7, 6, 5],
+    [12, 11, 10, 9],
+    [16, 15, 14, 13],
+    [20, 19, 18, 17],
+])
+
+def _vector_weights():
+    """(5, 21) weights turning landmark xy into the vectors the angles are measured from"""
+    weights = np.zeros((5, 21), dtype=np.float32)
+    for row, terms in enumerate([
+        {3: 1, 2: -1},              # thumb IP <- MCP
+        {0: 1, 8: -1},              # wrist <- index tip
+        {5: 0.5, 17: 0.5, 0: -1},   # wrist -> index/pinky MCP midpoint
+        {3: 1, 4: -1},              # thumb IP <- tip
+        {0: 1, 4: -1},              # wrist <- thumb tip
+    ]):
+        for index, weight in terms.items():
+            weights[row, index] = weight
+    return weights
+
+# One matmul yields every vector needed for the thumb, index-thumb and wrist angles
+ANGLE_VECTOR_WEIGHTS = _vector_weights()
+
+# Minimum pixel rise of a fingertip above its PIP joint to count as raised
+FINGER_RAISE_THRESHOLD = 15
+THUMB_ANGLE_THRESHOLD = 30
+
+def landmarks_to_array(hand_landmarks, width, height):
+    """Copy a MediaPipe landmark list into a (21, 3) float32 pixel-space array"""
+    landmarks = np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32)
+    landmarks *= (width, height, width)
+    return landmarks
+
+def hand_angles(landmarks):
+    """Thumb IP angle, index-thumb angle at the wrist, and wrist rotation (0-180) in degrees"""
+    # The complex view below needs float32 (x, y) pairs
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    # Treat each (x, y) vector as a complex number so all three angles come from one np.angle
+    vectors = (ANGLE_VECTOR_WEIGHTS @ landmarks[:, :2]).view(np.complex64).ravel()
+    turns = vectors[:3].copy()
+    turns[:2] *= vectors[3:].conj()
+    return np.degrees(np.abs(np.angle(turns))).tolist()
+
+def compute_hand_features(landmarks, hand_label):
+    """Finger states, index-thumb angle and wrist rotation in a few array operations"""
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    xy = landmarks[:, :2]
+    thumb_angle, finger_angle, hand_angle = hand_angles(landmarks)
+
+    # (4, 4) y coordinates: tip, dip, pip, mcp per finger
+    y = xy[FINGER_JOINTS, 1]
+    raised = ((y[:, 0] < y[:, 2]) &
+              (y[:, 1] < y[:, 3]) &
+              ((y[:, 2] - y[:, 0]) > FINGER_RAISE_THRESHOLD))
+
+    # Thumb points outward: left in the image for a right hand, right for a left hand
+    if hand_label == "Right":
+        thumb_out = xy[4, 0] < xy[3, 0]
+    else:
+        thumb_out = xy[4, 0] > xy[3, 0]
+    thumb = bool(thumb_out and thumb_angle > THUMB_ANGLE_THRESHOLD)
+
+    fingers = [int(thumb)] + raised.astype(int).tolist()
+    return fingers, finger_angle, hand_angle
+
+def landmarks_to_points(landmarks):
+    """Integer (x, y) pixel pairs for JSON/overlay output"""
+    return np.rint(landmarks[:, :2]).astype(np.int32).tolist()
@@ -0,0 +1,279 @@
+"""
+Process pool running MediaPipe Hands outside the main interpreter
+
+Each source is pinned to one worker process, which keeps a separate Hands
+instance per source so MediaPipe's tracking state never mixes cameras.
+Frames travel through a shared-memory FrameRing per source; only small
+task and result tuples go through the queues, and a busy worker always
+moves on to the newest committed frame.
+"""
+import os
+import time
+import queue
+import threading
+import multiprocessing
+import cv2
+import numpy as np
+from backend.config import HANDS_OPTIONS
+from backend.core.frame_ring import FrameRing
+
+def worker_main(worker_id, tasks, results):
+    """Worker process loop: detect hands in the newest frame of the ring named by each task"""
+    import mediapipe as mp
+    from backend.core.hand_features import landmarks_to_array
+
+    hands_by_source = {}
+    rings = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        source, ring_spec = task
+        start = time.time()
+        seq = 0
+        try:
+            ring = rings.get(source)
+            if ring is None or ring.name != ring_spec["name"]:
+                # New source, or its ring was recreated for a different frame size
+                if ring is not None:
+                    ring.close()
+                ring = FrameRing(**ring_spec)
+                rings[source] = ring
+            borrowed = ring.acquire(0)
+            if borrowed is None:
+                results.put((source, ring.latest_seq, None, None, 0.0, worker_id, None))
+                continue
+
+            hands = hands_by_source.get(source)
+            if hands is None:
+                hands = mp.solutions.hands.Hands(**HANDS_OPTIONS)
+                hands_by_source[source] = hands
+
+            seq, frame, _ = borrowed
+            try:
+                # cvtColor reads the shared slot directly; the RGB copy is MediaPipe's input
+                detection = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            finally:
+                del frame, borrowed
+                ring.release(0)
+            height, width = ring.shape[:2]
+            landmarks = hand_label = None
+            if detection.multi_hand_landmarks:
+                hand_label = detection.multi_handedness[0].classification[0].label
+                landmarks = landmarks_to_array(detection.multi_hand_landmarks[0], width, height)
+            results.put((source, seq, landmarks, hand_label, (time.time() - start) * 1000, worker_id, None))
+        except Exception as e:
+            results.put((source, seq, None, None, (time.time() - start) * 1000, worker_id, str(e)))
+
+    for hands in hands_by_source.values():
+        hands.close()
+    for ring in rings.values():
+        ring.close()
+
+class SourceSlot:
+    """Frame ring and bookkeeping for one registered source"""
+
+    def __init__(self, source, worker_id, callback):
+        self.source = source
+        self.worker_id = worker_id
+        self.callback = callback
+        self.ring = None
+        self._old_rings = []
+        self.in_flight = False
+        self.processed_seq = 0
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.avg_latency_ms = 0.0
+
+    def ensure_ring(self, shape):
+        if self.ring is None or self.ring.shape != tuple(shape):
+            if self.ring is not None:
+                # The worker may still be reading it; closed once it is idle
+                self._old_rings.append(self.ring)
+            self.ring = FrameRing(shape, slots=3, readers=1)
+        return self.ring
+
+    def close_old_rings(self):
+        for ring in self._old_rings:
+            ring.close()
+        self._old_rings = []
+
+    def release(self):
+        self.close_old_rings()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+class InferencePool:
+    """Hand detection spread over worker processes, one pinned worker per source"""
+
+    def __init__(self, workers=0):
+        self.requested_workers = workers
+        self._lock = threading.Lock()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._processes = []
+        self._task_queues = []
+        self._results = None
+        self._result_thread = None
+        self._slots = {}
+        self._retired = {}
+        self._running = False
+
+    @property
+    def worker_count(self):
+        return len(self._processes)
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            count = self.requested_workers or max(1, (os.cpu_count() or 2) - 1)
+            self._results = self._ctx.Queue()
+            for worker_id in range(count):
+                tasks = self._ctx.Queue()
+                process = self._ctx.Process(target=worker_main, args=(worker_id, tasks, self._results),
+                                            name=f"hands-worker-{worker_id}", daemon=True)
+                process.start()
+                self._task_queues.append(tasks)
+                self._processes.append(process)
+            self._running = True
+            self._result_thread = threading.Thread(target=self._collect_results, daemon=True)
+            self._result_thread.start()
+        print(f"[POOL] Started {count} inference worker(s)")
+
+    def stop(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            for tasks in self._task_queues:
+                tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._result_thread.join(timeout=2.0)
+        with self._lock:
+            for slot in list(self._slots.values()) + list(self._retired.values()):
+                slot.release()
+            self._slots.clear()
+            self._retired.clear()
+            self._processes.clear()
+            self._task_queues.clear()
+
+    def register_source(self, source, callback):
+        """Pin a source to the least loaded worker; callback(seq, landmarks, label, ms) gets results"""
+        with self._lock:
+            loads = [0] * len(self._processes)
+            for slot in self._slots.values():
+                loads[slot.worker_id] += 1
+            worker_id = loads.index(min(loads))
+            self._slots[source] = SourceSlot(source, worker_id, callback)
+            return worker_id
+
+    def unregister_source(self, source):
+        with self._lock:
+            slot = self._slots.pop(source, None)
+            if slot is None:
+                return
+            if slot.in_flight:
+                # Free the segment once the worker has finished reading it
+                self._retired[source] = slot
+            else:
+                slot.release()
+
+    def begin_frame(self, source, shape):
+        """Claim a ring slot to fill in place (e.g. cv2.resize(..., dst=slot)); returns (index, slot) or None"""
+        with self._lock:
+            slot = self._slots.get(source)
+            if slot is None or not self._running:
+                return None
+            return slot.ensure_ring(shape).begin_write()
+
+    def commit_frame(self, source, index):
+        """Publish a filled slot; the pinned worker picks up the newest frame when it is free"""
+        with self._lock:
+            slot = self._slots.get(source)
+            if slot is None or slot.ring is None:
+                return False
+            slot.ring.commit(index)
+            if slot.in_flight:
+                # Replaced by a newer frame before the worker got to it
+                slot.dropped += 1
+                return True
+            self._dispatch(slot)
+            return True
+
+    def submit(self, source, frame):
+        """Copy a frame into the source's ring (for producers that cannot fill a slot directly)"""
+        claimed = self.begin_frame(source, frame.shape)
+        if claimed is None:
+            return False
+        index, buffer = claimed
+        np.copyto(buffer, frame)
+        return self.commit_frame(source, index)
+
+    def _dispatch(self, slot):
+        slot.in_flight = True
+        slot.submitted += 1
+        self._task_queues[slot.worker_id].put((slot.source, slot.ring.spec()))
+
+    def _collect_results(self):
+        while True:
+            try:
+                result = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if not self._running:
+                    break
+                continue
+            if result is None:
+                break
+            source, seq, landmarks, hand_label, elapsed_ms, worker_id, error = result
+            with self._lock:
+                retired = self._retired.pop(source, None)
+                if retired is not None:
+                    # Last task of an unregistered source; its rings can go now
+                    retired.release()
+                    continue
+                slot = self._slots.get(source)
+                if slot is None:
+                    continue
+                slot.in_flight = False
+                slot.completed += 1
+                slot.processed_seq = max(slot.processed_seq, seq)
+                slot.avg_latency_ms = slot.avg_latency_ms * 0.9 + elapsed_ms * 0.1
+                if error:
+                    slot.errors += 1
+                slot.close_old_rings()
+                # Frames committed while the worker was busy: process the newest one now
+                if self._running and slot.ring is not None and slot.ring.latest_seq > slot.processed_seq:
+                    self._dispatch(slot)
+            if error:
+                print(f"[POOL] Worker {worker_id} failed on {source}: {error}")
+                continue
+            try:
+                slot.callback(seq, landmarks, hand_label, elapsed_ms)
+            except Exception as e:
+                print(f"[POOL] Result handler error for {source}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._running,
+                "workers": [{"id": i, "alive": p.is_alive(), "pid": p.pid}
+                            for i, p in enumerate(self._processes)],
+                "sources": {
+                    name: {
+                        "worker": slot.worker_id,
+                        "submitted": slot.submitted,
+                        "completed": slot.completed,
+                        "dropped": slot.dropped,
+                        "errors": slot.errors,
+                        "avg_latency_ms": round(slot.avg_latency_ms, 1),
+                    }
+                    for name, slot in self._slots.items()
+                },
+            }
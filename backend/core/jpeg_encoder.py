@@ -0,0 +1,110 @@
+"""
+Pluggable JPEG encoders for the video stream
+
+libjpeg-turbo through PyTurboJPEG (optional, `pip install PyTurboJPEG` plus
+the libturbojpeg shared library) when available, cv2.imencode otherwise.
+Selected by settings["jpeg_encoder"]: "auto", "turbojpeg" or "opencv".
+"""
+import threading
+import cv2
+from backend.config import settings
+
+# Chroma subsampling names shared by both backends
+SUBSAMPLING_MODES = ("444", "422", "420")
+
+class OpenCVEncoder:
+    """cv2.imencode; fast DCT is not exposed by OpenCV and is ignored"""
+
+    name = "opencv"
+
+    SAMPLING_FACTORS = {
+        "444": cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444,
+        "422": cv2.IMWRITE_JPEG_SAMPLING_FACTOR_422,
+        "420": cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+    }
+
+    def __init__(self, subsampling="420", fast_dct=False):
+        self.subsampling = subsampling
+        self.fast_dct = False
+        self._sampling = self.SAMPLING_FACTORS[subsampling]
+
+    def encode(self, frame, quality=85):
+        """JPEG bytes-like buffer for a BGR frame, or None"""
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality),
+                  int(cv2.IMWRITE_JPEG_SAMPLING_FACTOR), self._sampling]
+        ret, buffer = cv2.imencode('.jpg', frame, params)
+        return buffer if ret else None
+
+class TurboJPEGEncoder:
+    """libjpeg-turbo via PyTurboJPEG; raises ImportError/OSError/RuntimeError when unavailable"""
+
+    name = "turbojpeg"
+
+    def __init__(self, subsampling="420", fast_dct=True):
+        import turbojpeg
+        self._turbo = turbojpeg.TurboJPEG()
+        self.subsampling = subsampling
+        self.fast_dct = fast_dct
+        self._pixel_format = turbojpeg.TJPF_BGR
+        self._subsample = {
+            "444": turbojpeg.TJSAMP_444,
+            "422": turbojpeg.TJSAMP_422,
+            "420": turbojpeg.TJSAMP_420,
+        }[subsampling]
+        self._flags = turbojpeg.TJFLAG_FASTDCT if fast_dct else 0
+
+    def encode(self, frame, quality=85):
+        """JPEG bytes for a BGR frame, or None"""
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        try:
+            return self._turbo.encode(frame, quality=int(quality), pixel_format=self._pixel_format,
+                                      jpeg_subsample=self._subsample, flags=self._flags)
+        except Exception as e:
+            print(f"[JPEG] turbojpeg encode failed: {e}")
+            return None
+
+ENCODERS = {
+    "turbojpeg": TurboJPEGEncoder,
+    "opencv": OpenCVEncoder,
+}
+
+def create_encoder(name="auto", subsampling="420", fast_dct=True):
+    """Build the requested encoder; "auto" or a failed turbojpeg falls back to OpenCV"""
+    if subsampling not in SUBSAMPLING_MODES:
+        print(f"[JPEG] Unknown subsampling '{subsampling}', using 420")
+        subsampling = "420"
+    candidates = ["turbojpeg", "opencv"] if name == "auto" else [name, "opencv"]
+    for candidate in candidates:
+        encoder_class = ENCODERS.get(candidate)
+        if encoder_class is None:
+            print(f"[JPEG] Unknown encoder '{candidate}'")
+            continue
+        try:
+            return encoder_class(subsampling=subsampling, fast_dct=fast_dct)
+        except (ImportError, OSError, RuntimeError) as e:
+            if name != "auto":
+                print(f"[JPEG] {candidate} unavailable ({e}), falling back to OpenCV")
+    return OpenCVEncoder(subsampling=subsampling)
+
+_encoder = None
+_encoder_key = None
+_encoder_lock = threading.Lock()
+
+def get_encoder():
+    """Encoder matching the current settings, rebuilt when they change"""
+    global _encoder, _encoder_key
+    key = (settings.get("jpeg_encoder", "auto"), settings.get("jpeg_subsampling", "420"),
+           settings.get("jpeg_fast_dct", True))
+    if key != _encoder_key:
+        with _encoder_lock:
+            if key != _encoder_key:
+                _encoder = create_encoder(*key)
+                _encoder_key = key
+                print(f"[JPEG] Using {_encoder.name} encoder (subsampling {_encoder.subsampling}"
+                      f"{', fast DCT' if _encoder.fast_dct else ''})")
+    return _encoder
+
+def encode_jpeg(frame, quality=85):
+    """Encode a BGR frame with the configured encoder; returns a bytes-like buffer or None"""
+    return get_encoder().encode(frame, quality)
@@ -0,0 +1,93 @@
+"""
+Temporal smoothing of hand landmarks between MediaPipe and finger classification
+"""
+import math
+import threading
+import numpy as np
+from backend.core.utils import smooth_value
+
+def smoothing_factor(cutoff, elapsed):
+    """Weight of the previous estimate for a low-pass filter at cutoff Hz (scalar or array)"""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return tau / (tau + elapsed)
+
+class LandmarkFilter:
+    """One-Euro filter over the whole (21, 3) landmark array
+
+    Every coordinate gets its own adaptive cutoff: slow movement is smoothed
+    hard (jitter near min_cutoff Hz is removed), fast movement raises the
+    cutoff by beta * speed so real gestures are not lagged. The filtered
+    velocity is kept, so landmarks can be extrapolated for frames that skip
+    inference (skip_frames) for up to max_predict_seconds.
+    """
+
+    def __init__(self, min_cutoff=0.5, beta=0.02, derivative_cutoff=1.0,
+                 max_gap_seconds=0.5, max_predict_seconds=0.2):
+        self.min_cutoff = min_cutoff                    # Hz at rest
+        self.beta = beta                                # cutoff increase per pixel/second
+        self.derivative_cutoff = derivative_cutoff      # Hz for the velocity estimate
+        self.max_gap_seconds = max_gap_seconds          # older state is dropped, not filtered from
+        self.max_predict_seconds = max_predict_seconds  # extrapolation horizon
+        self._lock = threading.Lock()
+        self._position = None
+        self._velocity = None
+        self._time = 0.0
+        self.filtered = 0
+        self.predicted = 0
+        self.resets = 0
+        self._correction = 0.0      # smoothed mean |raw - filtered| in pixels
+
+    def configure(self, min_cutoff, beta):
+        self.min_cutoff = max(0.01, float(min_cutoff))
+        self.beta = max(0.0, float(beta))
+
+    def reset(self):
+        with self._lock:
+            if self._position is not None:
+                self.resets += 1
+            self._position = None
+            self._velocity = None
+
+    def filter(self, landmarks, timestamp):
+        """Smoothed copy of a (21, 3) landmark array observed at timestamp (seconds)"""
+        with self._lock:
+            elapsed = timestamp - self._time
+            if self._position is None or elapsed <= 0 or elapsed > self.max_gap_seconds:
+                self._position = landmarks.astype(np.float32, copy=True)
+                self._velocity = np.zeros_like(self._position)
+                self._time = timestamp
+                return self._position.copy()
+
+            velocity = (landmarks - self._position) / elapsed
+            self._velocity = smooth_value(self._velocity, velocity,
+                                          smoothing_factor(self.derivative_cutoff, elapsed))
+            cutoff = self.min_cutoff + self.beta * np.abs(self._velocity)
+            position = smooth_value(self._position, landmarks, smoothing_factor(cutoff, elapsed))
+
+            self._correction = smooth_value(self._correction, float(np.abs(landmarks - position).mean()), 0.9)
+            self._position = position.astype(np.float32, copy=False)
+            self._time = timestamp
+            self.filtered += 1
+            return self._position.copy()
+
+    def predict(self, timestamp):
+        """Landmarks extrapolated to timestamp from the filtered velocity, or None"""
+        with self._lock:
+            if self._position is None:
+                return None
+            elapsed = min(timestamp - self._time, self.max_predict_seconds)
+            if elapsed < 0 or timestamp - self._time > self.max_gap_seconds:
+                return None
+            self.predicted += 1
+            return self._position + self._velocity * elapsed
+
+    def stats(self):
+        return {
+            "tracking": self._position is not None,
+            "filtered": self.filtered,
+            "predicted": self.predicted,
+            "resets": self.resets,
+            "mean_correction_px": round(self._correction, 2),
+            "min_cutoff": self.min_cutoff,
+            "beta": self.beta,
+        }
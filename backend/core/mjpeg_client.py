@@ -0,0 +1,252 @@
+"""
+Lightweight MJPEG (multipart/x-mixed-replace) stream client for the ESP32-CAM
+"""
+import socket
+import time
+import cv2
+import numpy as np
+from urllib.parse import urlsplit
+
+# cv2.imdecode flags for decoding at 1/1, 1/2, 1/4 and 1/8 size
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def reduction_for_scale(processing_scale):
+    """Largest supported JPEG decode reduction that does not go below processing_scale"""
+    best = 1
+    for factor in sorted(REDUCED_DECODE_FLAGS):
+        if 1.0 / factor >= processing_scale - 1e-6:
+            best = factor
+    return best
+
+def decode_jpeg(data, reduction=1):
+    """Decode JPEG bytes to a BGR frame, optionally at reduced size"""
+    flag = REDUCED_DECODE_FLAGS.get(reduction, cv2.IMREAD_COLOR)
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+
+class MJPEGStreamReader:
+    """Parses multipart JPEG parts straight off a socket; mirrors the cv2.VideoCapture API"""
+
+    RECV_SIZE = 65536
+
+    def __init__(self, url, timeout=5.0, reduction=1):
+        self.url = url
+        self.timeout = timeout
+        self.reduction = reduction
+        self._sock = None
+        self._raw = bytearray()
+        self._body = bytearray()
+        self._chunked = False
+        self._chunk_left = 0
+        self._need_crlf = False
+        self._eof = False
+        self._boundary = None
+        self.frames_read = 0
+        self.bytes_read = 0
+        self.open_time_ms = None
+
+    def open(self):
+        """Connect, send the GET request and parse the response headers"""
+        parts = urlsplit(self.url)
+        host = parts.hostname
+        port = parts.port or 80
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        start = time.time()
+        try:
+            self._sock = socket.create_connection((host, port), timeout=self.timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            request = (f"GET {path} HTTP/1.1\r\n"
+                       f"Host: {host}:{port}\r\n"
+                       f"Accept: multipart/x-mixed-replace\r\n"
+                       f"Connection: keep-alive\r\n\r\n")
+            self._sock.sendall(request.encode("ascii"))
+
+            headers = self._read_headers()
+            if headers is None:
+                raise ConnectionError("no HTTP response headers")
+            status_line, fields = headers
+            if b" 200 " not in status_line + b" ":
+                raise ConnectionError(f"unexpected response: {status_line.decode(errors='replace')}")
+
+            content_type = fields.get("content-type", "")
+            if "boundary=" not in content_type:
+                raise ConnectionError(f"not a multipart stream: {content_type}")
+            boundary = content_type.split("boundary=", 1)[1].split(";")[0].strip().strip('"')
+            self._boundary = boundary.lstrip("-").encode("ascii")
+            self._chunked = "chunked" in fields.get("transfer-encoding", "").lower()
+
+            # Whatever followed the headers is already body data
+            pending = bytes(self._raw)
+            self._raw.clear()
+            self._feed(pending)
+
+            self.open_time_ms = (time.time() - start) * 1000
+            print(f"[MJPEG] Connected to {self.url} in {self.open_time_ms:.0f}ms")
+            return True
+        except (OSError, ConnectionError, ValueError) as e:
+            print(f"[MJPEG] Failed to open {self.url}: {e}")
+            self.release()
+            return False
+
+    def _recv(self):
+        data = self._sock.recv(self.RECV_SIZE)
+        if not data:
+            self._eof = True
+        self.bytes_read += len(data)
+        return data
+
+    def _read_headers(self):
+        while b"\r\n\r\n" not in self._raw:
+            data = self._recv()
+            if not data:
+                return None
+            self._raw += data
+        end = self._raw.index(b"\r\n\r\n")
+        lines = bytes(self._raw[:end]).split(b"\r\n")
+        del self._raw[:end + 4]
+        fields = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            fields[name.strip().lower().decode("latin-1")] = value.strip().decode("latin-1")
+        return lines[0], fields
+
+    def _feed(self, data):
+        """Append socket data to the body, undoing chunked transfer encoding if needed"""
+        if not self._chunked:
+            self._body += data
+            return
+
+        raw = self._raw
+        raw += data
+        while raw:
+            if self._chunk_left > 0:
+                take = min(self._chunk_left, len(raw))
+                self._body += raw[:take]
+                del raw[:take]
+                self._chunk_left -= take
+                if self._chunk_left == 0:
+                    self._need_crlf = True
+                continue
+            if self._need_crlf:
+                if len(raw) < 2:
+                    break
+                del raw[:2]
+                self._need_crlf = False
+            line_end = raw.find(b"\r\n")
+            if line_end < 0:
+                break
+            size = int(bytes(raw[:line_end]).split(b";")[0] or b"0", 16)
+            del raw[:line_end + 2]
+            if size == 0:
+                self._eof = True
+                break
+            self._chunk_left = size
+
+    def _fill(self):
+        data = self._recv()
+        if data:
+            self._feed(data)
+        return bool(data)
+
+    def read_jpeg(self):
+        """Return the next part's JPEG bytes, or None when the stream ends"""
+        if self._sock is None:
+            return None
+
+        body = self._body
+        try:
+            # Locate the boundary line
+            while True:
+                idx = body.find(self._boundary)
+                if idx >= 0:
+                    line_end = body.find(b"\r\n", idx)
+                    if line_end >= 0:
+                        del body[:line_end + 2]
+                        break
+                elif len(body) > len(self._boundary):
+                    # Keep only a tail that could hold a split boundary
+                    del body[:len(body) - len(self._boundary)]
+                if self._eof or not self._fill():
+                    return None
+
+            # Part headers
+            while b"\r\n\r\n" not in body:
+                if self._eof or not self._fill():
+                    return None
+            header_end = body.index(b"\r\n\r\n")
+            content_length = None
+            for line in bytes(body[:header_end]).split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    content_length = int(value.strip())
+            del body[:header_end + 4]
+
+            if content_length is not None:
+                while len(body) < content_length:
+                    if self._eof or not self._fill():
+                        return None
+                jpeg = bytes(body[:content_length])
+                del body[:content_length]
+            else:
+                # No length header, the part runs until the next boundary
+                while True:
+                    idx = body.find(self._boundary)
+                    if idx >= 0:
+                        break
+                    if self._eof or not self._fill():
+                        return None
+                jpeg = bytes(body[:idx]).rstrip(b"-").rstrip(b"\r\n")
+                del body[:idx]
+        except (OSError, ValueError) as e:
+            print(f"[MJPEG] Stream error: {e}")
+            self.release()
+            return None
+
+        self.frames_read += 1
+        return jpeg
+
+    def decode(self, jpeg, image=None):
+        """Decode JPEG bytes at the configured reduction, into image when its shape matches"""
+        frame = decode_jpeg(jpeg, self.reduction)
+        # cv2.imdecode has no dst argument in Python, so fill the caller's buffer with one copy
+        if image is not None and frame is not None and frame.shape == image.shape:
+            np.copyto(image, frame)
+            return image
+        return frame
+
+    def read(self, image=None):
+        """cv2.VideoCapture-compatible read returning (success, frame)"""
+        jpeg = self.read_jpeg()
+        if jpeg is None:
+            return False, None
+        frame = self.decode(jpeg, image)
+        if frame is None:
+            return False, None
+        return True, frame
+
+    def isOpened(self):
+        return self._sock is not None
+
+    def set(self, prop, value):
+        # Capture properties are handled by the camera firmware, not the client
+        return False
+
+    def get(self, prop):
+        return 0
+
+    def release(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._raw.clear()
+        self._body.clear()
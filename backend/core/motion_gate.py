@@ -0,0 +1,79 @@
+"""
+Motion gate: skip hand inference while the scene is static and no hand was seen recently
+"""
+import time
+import cv2
+import numpy as np
+
+THUMB_SIZE = (32, 24)
+
+def frame_thumbnail(frame):
+    """Tiny grayscale thumbnail of a BGR frame"""
+    small = cv2.resize(frame, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+def jpeg_thumbnail(data):
+    """Tiny grayscale thumbnail straight from JPEG bytes (1/8 scale decode)"""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    gray = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+    return cv2.resize(gray, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+
+class MotionGate:
+    """Compares each thumbnail with a running background average"""
+
+    def __init__(self, pixel_threshold=15, area_threshold=0.01, alpha=0.05, hold_seconds=2.0):
+        self.pixel_threshold = pixel_threshold  # grey levels a pixel must change by
+        self.area_threshold = area_threshold    # fraction of changed pixels that counts as motion
+        self.alpha = alpha                      # background adaptation rate
+        self.hold_seconds = hold_seconds        # keep inferring this long after a hand was seen
+        self._background = None
+        self._last_hand = 0.0
+        self.motion_score = 0.0
+        self.gated = 0
+        self.processed = 0
+        self.motion_triggers = 0
+
+    def reset(self):
+        self._background = None
+        self._last_hand = 0.0
+
+    def hand_seen(self):
+        self._last_hand = time.time()
+
+    def should_process(self, thumbnail):
+        """Update the background and decide whether this frame needs full inference"""
+        if thumbnail is None:
+            self.processed += 1
+            return True
+
+        current = thumbnail.astype(np.float32)
+        if self._background is None or self._background.shape != current.shape:
+            self._background = current
+            self.processed += 1
+            return True
+
+        changed = cv2.absdiff(current, self._background) > self.pixel_threshold
+        self.motion_score = float(np.count_nonzero(changed)) / changed.size
+        cv2.accumulateWeighted(current, self._background, self.alpha)
+
+        if self.motion_score >= self.area_threshold:
+            self.motion_triggers += 1
+            self.processed += 1
+            return True
+        if time.time() - self._last_hand < self.hold_seconds:
+            self.processed += 1
+            return True
+        self.gated += 1
+        return False
+
+    def stats(self):
+        total = self.gated + self.processed
+        return {
+            "gated": self.gated,
+            "processed": self.processed,
+            "motion_triggers": self.motion_triggers,
+            "gated_ratio": round(self.gated / total, 3) if total else None,
+            "motion_score": round(self.motion_score, 4),
+        }
@@ -0,0 +1,191 @@
+"""
+Threaded stage pipeline with bounded latest-wins queues
+"""
+import time
+import threading
+from collections import deque
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item when full so readers always get fresh data"""
+
+    def __init__(self, name, maxsize=1, on_drop=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self._items = deque()
+        self._condition = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        """Add an item, discarding the oldest one if the queue is full"""
+        dropped = None
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._condition.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout=0.5):
+        """Return the oldest queued item, or None if nothing arrives within timeout"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._items) > 0, timeout=timeout):
+                return None
+            return self._items.popleft()
+
+    def clear(self):
+        with self._condition:
+            items = list(self._items)
+            self._items.clear()
+        if self.on_drop is not None:
+            for item in items:
+                self.on_drop(item)
+
+    @property
+    def depth(self):
+        return len(self._items)
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "maxsize": self.maxsize,
+            "put": self.put_count,
+            "dropped": self.dropped,
+        }
+
+class PipelineStage:
+    """Worker thread that applies a function to items from its input queue"""
+
+    def __init__(self, name, func, input_queue=None, output_queue=None, on_error=None, on_release=None):
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.on_error = on_error
+        self.on_release = on_release
+        self.processed = 0
+        self.errors = 0
+        self.avg_time_ms = 0.0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def join(self, timeout=None):
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while self._running:
+            # Source stages have no input queue and produce items on their own
+            if self.input_queue is not None:
+                item = self.input_queue.get()
+                if item is None:
+                    continue
+            else:
+                item = None
+
+            start = time.time()
+            try:
+                result = self.func(item) if self.input_queue is not None else self.func()
+            except Exception as e:
+                self.errors += 1
+                print(f"[PIPELINE] Stage '{self.name}' error: {e}")
+                if self.on_error is not None:
+                    try:
+                        self.on_error(self.name, e)
+                    except Exception as handler_error:
+                        print(f"[PIPELINE] Error handler for '{self.name}' failed: {handler_error}")
+                self.release(item)
+                time.sleep(0.5)
+                continue
+
+            elapsed = (time.time() - start) * 1000
+            self.avg_time_ms = self.avg_time_ms * 0.9 + elapsed * 0.1
+            self.processed += 1
+
+            if result is not item:
+                self.release(item)
+            if result is not None and self.output_queue is not None:
+                self.output_queue.put(result)
+            else:
+                self.release(result)
+
+    def release(self, item):
+        """Hand an item that goes no further back to its owner"""
+        if item is not None and self.on_release is not None:
+            self.on_release(item)
+
+    @property
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        stats = {
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_time_ms": round(self.avg_time_ms, 2),
+            "alive": self.is_alive,
+        }
+        if self.input_queue is not None:
+            stats["queue"] = self.input_queue.stats()
+        return stats
+
+class StagedPipeline:
+    """Chain of stages connected by latest-wins queues"""
+
+    def __init__(self, name, queue_size=1, on_error=None, on_release=None):
+        self.name = name
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self.on_release = on_release   # called with every item that is dropped or leaves the last stage
+        self.stages = []
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, func):
+        """Append a stage fed by the previous stage's output; the first stage is the source"""
+        input_queue = None
+        if self.stages:
+            input_queue = LatestQueue(name, self.queue_size, on_drop=self.on_release)
+            self.stages[-1].output_queue = input_queue
+        stage = PipelineStage(name, func, input_queue=input_queue, on_error=self.on_error,
+                              on_release=self.on_release)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        with self._lock:
+            for stage in self.stages:
+                stage.start()
+        print(f"[PIPELINE] '{self.name}' started with stages: {' -> '.join(s.name for s in self.stages)}")
+
+    def stop(self, timeout=None):
+        """Stop every stage; with a timeout, wait for each to finish its current item"""
+        with self._lock:
+            for stage in self.stages:
+                stage.stop()
+            if timeout is not None:
+                for stage in self.stages:
+                    stage.join(timeout)
+            for stage in self.stages:
+                if stage.input_queue is not None:
+                    stage.input_queue.clear()
+
+    @property
+    def is_running(self):
+        return any(stage.is_alive for stage in self.stages)
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
@@ -0,0 +1,105 @@
+"""
+Region-of-interest tracking: crop around the last detected hand instead of
+sending the whole frame to MediaPipe
+"""
+import threading
+
+class RoiTracker:
+    """Predicts the next hand window from the previous landmarks"""
+
+    def __init__(self, margin=0.35, min_size=96, max_area_ratio=0.6, input_size=256,
+                 velocity_gain=1.0):
+        self.margin = margin                    # padding around the landmark box, fraction of its size
+        self.min_size = min_size                # smallest window side in frame pixels
+        self.max_area_ratio = max_area_ratio    # larger windows are not worth cropping
+        self.input_size = input_size            # longest side passed to MediaPipe
+        self.velocity_gain = velocity_gain
+        self._lock = threading.Lock()
+        self._box = None                        # (x0, y0, x1, y1) of the last landmarks
+        self._velocity = (0.0, 0.0)             # box centre motion per frame
+        self._last_frame = 0
+        self.attempts = 0
+        self.hits = 0
+        self.fallbacks = 0
+        self.full_frame = 0
+
+    def reset(self):
+        with self._lock:
+            self._box = None
+            self._velocity = (0.0, 0.0)
+
+    def predict(self, frame_index, width, height):
+        """Window (x0, y0, x1, y1) to search on this frame, or None for full-frame detection"""
+        with self._lock:
+            if self._box is None:
+                self.full_frame += 1
+                return None
+            x0, y0, x1, y1 = self._box
+            elapsed = max(1, frame_index - self._last_frame)
+            dx = self._velocity[0] * elapsed * self.velocity_gain
+            dy = self._velocity[1] * elapsed * self.velocity_gain
+
+        # Square window around the predicted centre, padded by the margin
+        size = max(x1 - x0, y1 - y0) * (1.0 + 2.0 * self.margin)
+        size = max(size, self.min_size)
+        cx = (x0 + x1) * 0.5 + dx
+        cy = (y0 + y1) * 0.5 + dy
+        left = int(max(0, cx - size * 0.5))
+        top = int(max(0, cy - size * 0.5))
+        right = int(min(width, cx + size * 0.5))
+        bottom = int(min(height, cy + size * 0.5))
+
+        if (right - left) * (bottom - top) > self.max_area_ratio * width * height:
+            self.full_frame += 1
+            return None
+        if right - left < 16 or bottom - top < 16:
+            # Predicted off-screen; let full-frame detection find it again
+            self.reset()
+            self.full_frame += 1
+            return None
+        self.attempts += 1
+        return left, top, right, bottom
+
+    def crop(self, frame, window):
+        """Cut the window out and scale it to at most input_size; returns (crop, scale)"""
+        left, top, right, bottom = window
+        crop = frame[top:bottom, left:right]
+        longest = max(right - left, bottom - top)
+        if longest <= self.input_size:
+            return crop, 1.0
+        scale = self.input_size / longest
+        return crop, scale
+
+    def update(self, landmarks, frame_index, hit=False):
+        """Record landmarks (frame coordinates) from a successful detection"""
+        xy = landmarks[:, :2]
+        x0, y0 = xy.min(axis=0).tolist()
+        x1, y1 = xy.max(axis=0).tolist()
+        with self._lock:
+            if self._box is not None:
+                elapsed = max(1, frame_index - self._last_frame)
+                px0, py0, px1, py1 = self._box
+                self._velocity = (
+                    ((x0 + x1) - (px0 + px1)) * 0.5 / elapsed,
+                    ((y0 + y1) - (py0 + py1)) * 0.5 / elapsed,
+                )
+            self._box = (x0, y0, x1, y1)
+            self._last_frame = frame_index
+            if hit:
+                self.hits += 1
+
+    def lost(self, from_roi=False):
+        """No hand found; the next frame starts from a full-frame search"""
+        if from_roi:
+            self.fallbacks += 1
+        self.reset()
+
+    def stats(self):
+        return {
+            "tracking": self._box is not None,
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "full_frame": self.full_frame,
+            "hit_rate": round(self.hits / self.attempts, 3) if self.attempts else None,
+        }
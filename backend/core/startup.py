@@ -0,0 +1,122 @@
+"""
+Startup phase timing and readiness of resources initialized in the background
+
+app.py marks the synchronous phases (imports, app creation); heavy
+resources (MediaPipe model, ESP8266 warm-up, camera detection) register a
+loader here and are loaded on a background thread once the server is
+accepting connections. /api/health reports their state.
+"""
+import time
+import socket
+import threading
+from contextlib import contextmanager
+
+# Close enough to process start: this module is the first thing app.py imports
+PROCESS_START = time.time()
+
+phases = []
+resources = {}
+_lock = threading.Lock()
+_last_mark = PROCESS_START
+_background_thread = None
+
+def record_phase(name, elapsed_ms, ok=True, error=None):
+    with _lock:
+        phases.append({"phase": name, "ms": round(elapsed_ms, 1), "ok": ok,
+                       "at_ms": round((time.time() - PROCESS_START) * 1000, 1)})
+    status = "" if ok else f" (failed: {error})"
+    print(f"[STARTUP] {name}: {elapsed_ms:.0f} ms{status}")
+
+def mark(name):
+    """Record the time since the previous mark as a synchronous startup phase"""
+    global _last_mark
+    now = time.time()
+    record_phase(name, (now - _last_mark) * 1000)
+    _last_mark = now
+
+@contextmanager
+def phase(name):
+    """Time a block as a startup phase"""
+    start = time.time()
+    try:
+        yield
+    except Exception as e:
+        record_phase(name, (time.time() - start) * 1000, ok=False, error=e)
+        raise
+    record_phase(name, (time.time() - start) * 1000)
+
+def register_resource(name, loader, required=True):
+    """Add a resource to load in the background; required ones gate readiness"""
+    with _lock:
+        resources[name] = {"loader": loader, "required": required, "status": "pending",
+                           "error": None, "ms": None}
+
+def load_resource(name):
+    resource = resources[name]
+    resource["status"] = "loading"
+    start = time.time()
+    try:
+        with phase(name):
+            resource["loader"]()
+        resource["status"] = "ready"
+    except Exception as e:
+        resource["status"] = "failed"
+        resource["error"] = str(e)
+    resource["ms"] = round((time.time() - start) * 1000, 1)
+
+def wait_for_port(port, host="127.0.0.1", timeout=30.0):
+    """Block until something accepts connections on host:port"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def start_background_init(port=None):
+    """Load the registered resources in parallel once the server listens on port"""
+    global _background_thread
+
+    def run():
+        if port is not None:
+            start = time.time()
+            listening = wait_for_port(port)
+            record_phase("server listening", (time.time() - start) * 1000, ok=listening,
+                         error=None if listening else f"port {port} not open")
+        loaders = [threading.Thread(target=load_resource, args=(name,), name=f"startup-{name}", daemon=True)
+                   for name in list(resources)]
+        for thread in loaders:
+            thread.start()
+        for thread in loaders:
+            thread.join()
+        print(f"[STARTUP] Background initialization done "
+              f"{(time.time() - PROCESS_START) * 1000:.0f} ms after start ({'ready' if is_ready() else 'not ready'})")
+
+    _background_thread = threading.Thread(target=run, name="startup-init", daemon=True)
+    _background_thread.start()
+    return _background_thread
+
+def is_ready():
+    return all(r["status"] == "ready" for r in resources.values() if r["required"])
+
+def health():
+    """Readiness summary for /api/health"""
+    with _lock:
+        states = {name: {"status": r["status"], "required": r["required"], "ms": r["ms"], "error": r["error"]}
+                  for name, r in resources.items()}
+        timeline = list(phases)
+    ready = is_ready()
+    failed = [r for r in states.values() if r["status"] == "failed"]
+    if ready:
+        status = "degraded" if failed else "ready"
+    else:
+        status = "failed" if any(r["required"] for r in failed) else "starting"
+    return {
+        "status": status,
+        "ready": ready,
+        "uptime_s": round(time.time() - PROCESS_START, 1),
+        "resources": states,
+        "phases": timeline,
+    }
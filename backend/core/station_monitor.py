@@ -0,0 +1,206 @@
+"""
+Detection-only monitors for additional camera sources ("stations")
+
+The dashboard stream shows one camera; every source listed in
+settings["stations"] gets its own capture thread and gesture state here,
+with hand detection running in the inference pool's worker processes.
+"""
+import atexit
+import time
+import threading
+import cv2
+from backend.config import settings
+from backend.core.camera_manager import create_capture, get_camera_source
+from backend.core.device_controller import create_gesture_state, control_devices_by_gesture
+from backend.core.hand_features import compute_hand_features, landmarks_to_points
+from backend.core.inference_pool import InferencePool
+from backend.core.landmark_filter import LandmarkFilter
+from backend.core.motion_gate import MotionGate, frame_thumbnail
+
+class StationMonitor:
+    """Capture thread for one source; detections arrive asynchronously from the pool"""
+
+    def __init__(self, name, source, pool):
+        self.name = name
+        self.source = source
+        self.pool = pool
+        self.gesture_state = create_gesture_state()
+        self.motion_gate = MotionGate()
+        self.landmark_filter = LandmarkFilter()
+        self._stop = threading.Event()
+        self._thread = None
+        self.capture = None
+        self.frames = 0
+        self.detections = 0
+        self.last_hand = None
+        self.last_error = None
+
+    def start(self):
+        self.pool.register_source(self.name, self._on_result)
+        self._thread = threading.Thread(target=self._run, name=f"station-{self.name}", daemon=True)
+        self._thread.start()
+        print(f"[STATION] Monitoring {self.name}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.pool.unregister_source(self.name)
+        print(f"[STATION] Stopped {self.name}")
+
+    def _open(self):
+        capture = create_capture(self.source, self.name)
+        if capture is None or not capture.isOpened():
+            return None
+        return capture
+
+    def _run(self):
+        retry_delay = 1.0
+        while not self._stop.is_set():
+            if self.capture is None:
+                self.capture = self._open()
+                if self.capture is None:
+                    self.last_error = "Cannot open camera"
+                    self._stop.wait(retry_delay)
+                    retry_delay = min(retry_delay * 2, 30.0)
+                    continue
+                retry_delay = 1.0
+                self.last_error = None
+
+            success, frame = self.capture.read()
+            if not success:
+                self.last_error = "Camera connection error"
+                self.capture.release()
+                self.capture = None
+                continue
+            self.frames += 1
+
+            if settings.get("motion_gating", True) and not self.motion_gate.should_process(frame_thumbnail(frame)):
+                continue
+
+            # Resize and mirror straight into a ring slot the worker reads from shared memory
+            scale = min(1.0, settings.get("processing_scale", 0.5))
+            height, width = frame.shape[:2]
+            size = (int(width * scale), int(height * scale))
+            claimed = self.pool.begin_frame(self.name, (size[1], size[0], 3))
+            if claimed is None:
+                continue
+            index, slot = claimed
+            if scale < 1.0:
+                cv2.resize(frame, size, dst=slot)
+                cv2.flip(slot, 1, dst=slot)
+            else:
+                cv2.flip(frame, 1, dst=slot)
+            del slot
+            self.pool.commit_frame(self.name, index)
+
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def _on_result(self, seq, landmarks, hand_label, elapsed_ms):
+        """Runs on the pool's result thread"""
+        self.detections += 1
+        if landmarks is None:
+            self.last_hand = None
+            self.landmark_filter.reset()
+            publish_station(self.name, None)
+            return
+
+        if settings.get("landmark_smoothing", True):
+            self.landmark_filter.configure(settings.get("landmark_min_cutoff", 0.5),
+                                           settings.get("landmark_beta", 0.02))
+            landmarks = self.landmark_filter.filter(landmarks, time.time())
+
+        fingers, finger_angle, hand_angle = compute_hand_features(landmarks, hand_label)
+        self.motion_gate.hand_seen()
+        self.last_hand = {
+            "landmarks": landmarks_to_points(landmarks),
+            "fingers": fingers,
+            "total_fingers": sum(fingers),
+            "finger_angle": round(finger_angle, 1),
+            "hand_angle": round(hand_angle, 1),
+            "detection_ms": round(elapsed_ms, 1),
+        }
+        publish_station(self.name, self.last_hand)
+
+        if settings.get("station_device_control", False):
+            control_devices_by_gesture(self.last_hand["fingers"], self.gesture_state)
+
+    def stats(self):
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "frames": self.frames,
+            "detections": self.detections,
+            "total_fingers": self.last_hand["total_fingers"] if self.last_hand else None,
+            "last_error": self.last_error,
+            "motion_gate": self.motion_gate.stats(),
+            "landmark_filter": self.landmark_filter.stats(),
+        }
+
+# Created on first use so the worker processes only start when stations are configured
+inference_pool = None
+stations = {}
+stations_lock = threading.Lock()
+station_listeners = []
+
+def add_station_listener(callback):
+    """Register a callback receiving {"station", "hand"} messages"""
+    station_listeners.append(callback)
+
+def publish_station(name, hand):
+    message = {"station": name, "hand": hand, "time": time.time()}
+    for callback in station_listeners:
+        try:
+            callback(message)
+        except Exception as e:
+            print(f"[STATION] Listener error: {e}")
+
+def sync_stations():
+    """Start/stop monitors so they match settings["stations"]"""
+    global inference_pool
+
+    main_source = settings.get("camera_source")
+    wanted = []
+    for name in settings.get("stations", []):
+        if get_camera_source(name) is None:
+            print(f"[STATION] Unknown camera source: {name}")
+        elif name == main_source:
+            # A camera can only be opened once; the dashboard stream already owns it
+            print(f"[STATION] {name} is the dashboard camera, not monitoring it separately")
+        else:
+            wanted.append(name)
+
+    with stations_lock:
+        for name in list(stations):
+            if name not in wanted:
+                stations.pop(name).stop()
+
+        if wanted and inference_pool is None:
+            inference_pool = InferencePool(workers=int(settings.get("inference_workers", 0)))
+            inference_pool.start()
+
+        for name in wanted:
+            if name not in stations:
+                monitor = StationMonitor(name, get_camera_source(name), inference_pool)
+                stations[name] = monitor
+                monitor.start()
+
+def stop_stations():
+    """Stop every monitor and the worker processes, unlinking their frame rings; runs at exit"""
+    global inference_pool
+    with stations_lock:
+        for name in list(stations):
+            stations.pop(name).stop()
+        if inference_pool is not None:
+            inference_pool.stop()
+            inference_pool = None
+
+atexit.register(stop_stations)
+
+def get_station_stats():
+    with stations_lock:
+        return {
+            "stations": {name: monitor.stats() for name, monitor in stations.items()},
+            "pool": inference_pool.stats() if inference_pool is not None else None,
+        }
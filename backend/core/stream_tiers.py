@@ -0,0 +1,144 @@
+"""
+Encode tiers and per-viewer pacing for /video_feed
+
+Viewers ask for a JPEG quality, a frame width and a frame rate. Quality
+and width snap to a few shared tiers, so each frame is encoded once per
+tier that has viewers, not once per viewer. Frame rate is per viewer: a
+viewer gets the newest frame when it is due, and one whose socket writes
+block is backed off so frames are dropped instead of queueing up.
+"""
+import time
+import socket
+import threading
+
+QUALITY_LEVELS = (50, 70, 85)
+DEFAULT_QUALITY = 85
+# Widths smaller than the capture; None keeps the capture resolution
+WIDTH_STEPS = (320, 480, 640)
+
+# A write blocking longer than this means the socket buffer was full
+SLOW_WRITE_SECONDS = 0.02
+MAX_BACKOFF_SECONDS = 2.0
+MAX_CLIENT_FPS = 30.0
+# Kernel send buffer for stream sockets: about one full-size frame, so a slow
+# viewer's writes block right away instead of after megabytes of stale frames
+STREAM_SEND_BUFFER = 64 * 1024
+
+def parse_size(size):
+    """Width from a size parameter like "320" or "320x240"; None if absent or invalid"""
+    if not size:
+        return None
+    try:
+        return int(str(size).lower().split("x")[0])
+    except ValueError:
+        return None
+
+def resolve_tier(quality=None, width=None):
+    """Snap requested quality/width to a tier key (quality, width or None)"""
+    if quality is None:
+        quality = DEFAULT_QUALITY
+    quality = min(QUALITY_LEVELS, key=lambda level: abs(level - quality))
+    if width is not None:
+        # Smallest step at least as wide as requested; beyond the last step, full size
+        width = next((step for step in WIDTH_STEPS if step >= width), None)
+    return quality, width
+
+DEFAULT_TIER = resolve_tier()
+
+def tier_label(tier):
+    quality, width = tier
+    return f"q{quality}" + (f"-{width}w" if width else "")
+
+def limit_send_buffer(environ, size=STREAM_SEND_BUFFER):
+    """Shrink the viewer socket's send buffer when the WSGI server exposes the socket"""
+    sock = environ.get("werkzeug.socket") or environ.get("gunicorn.socket")
+    if sock is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, size)
+        return True
+    except OSError:
+        return False
+
+class TierStats:
+    """Encode time and size for one tier"""
+
+    def __init__(self, tier):
+        self.tier = tier
+        self.frames = 0
+        self.avg_encode_ms = 0.0
+        self.avg_bytes = 0.0
+
+    def record(self, elapsed_ms, size):
+        if self.frames == 0:
+            self.avg_encode_ms, self.avg_bytes = elapsed_ms, float(size)
+        else:
+            self.avg_encode_ms = self.avg_encode_ms * 0.9 + elapsed_ms * 0.1
+            self.avg_bytes = self.avg_bytes * 0.9 + size * 0.1
+        self.frames += 1
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "avg_encode_ms": round(self.avg_encode_ms, 2),
+            "avg_kb": round(self.avg_bytes / 1024, 1),
+        }
+
+class StreamClient:
+    """Pacing and delivery counters for one /video_feed viewer"""
+
+    _ids = 0
+    _ids_lock = threading.Lock()
+
+    def __init__(self, tier=DEFAULT_TIER, max_fps=None):
+        with StreamClient._ids_lock:
+            StreamClient._ids += 1
+            self.id = StreamClient._ids
+        self.tier = tier
+        self.max_fps = min(MAX_CLIENT_FPS, max_fps) if max_fps and max_fps > 0 else None
+        self.min_interval = 1.0 / self.max_fps if self.max_fps else 0.0
+        self.backoff = 0.0
+        self.next_due = 0.0
+        self.connected_at = time.time()
+        self.delivered = 0
+        self.dropped = 0
+        self.slow_writes = 0
+        self.bytes_sent = 0
+        self.avg_write_ms = 0.0
+
+    def wait_time(self):
+        """Seconds until this viewer should get its next frame"""
+        return max(0.0, self.next_due - time.time())
+
+    def record_skipped(self, count):
+        """Frames published since the last delivery that this viewer never got"""
+        if count > 0:
+            self.dropped += count
+
+    def record_write(self, elapsed, size):
+        """Account one delivered chunk; elapsed is how long the server took to write it"""
+        self.delivered += 1
+        self.bytes_sent += size
+        self.avg_write_ms = self.avg_write_ms * 0.9 + elapsed * 1000 * 0.1
+        if elapsed > SLOW_WRITE_SECONDS:
+            # The socket could not take the frame: give it time to drain before the next one
+            self.slow_writes += 1
+            self.backoff = min(MAX_BACKOFF_SECONDS, max(elapsed, self.backoff * 1.5))
+        else:
+            self.backoff *= 0.5
+        self.next_due = time.time() + max(self.min_interval, self.backoff)
+
+    def stats(self):
+        elapsed = max(1e-6, time.time() - self.connected_at)
+        return {
+            "id": self.id,
+            "tier": tier_label(self.tier),
+            "max_fps": self.max_fps,
+            "fps": round(self.delivered / elapsed, 1),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "slow_writes": self.slow_writes,
+            "backoff_ms": round(self.backoff * 1000, 1),
+            "avg_write_ms": round(self.avg_write_ms, 2),
+            "kbps": round(self.bytes_sent * 8 / 1024 / elapsed, 1),
+        }
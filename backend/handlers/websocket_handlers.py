@@ -5,6 +5,8 @@ import time
 import threading
 from flask_socketio import emit
 from backend.config import device_status
+from backend.core.video_processor import add_overlay_listener
+from backend.core.station_monitor import add_station_listener
 
 def register_socketio_handlers(socketio):
     """Register all SocketIO event handlers"""
@@ -17,6 +19,12 @@ def register_socketio_handlers(socketio):
     @socketio.on('disconnect')
     def handle_disconnect():
         print('Client disconnected')
+    
+    # Landmarks, finger count and FPS for frames the browser overlays itself
+    add_overlay_listener(lambda message: socketio.emit('hand_data', message))
+    
+    # Detections from the extra camera stations
+    add_station_listener(lambda message: socketio.emit('station_data', message))
 
 def send_updates(socketio):
     """Send periodic updates to connected clients"""
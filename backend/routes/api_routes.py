@@ -3,15 +3,28 @@ Flask API routes
 """
 import time
 import cv2
-import requests
 from flask import request, jsonify, send_from_directory, Response
 from backend.config import (
     settings, last_settings_change, device_status,
-    camera_sources, cap, get_esp8266_ip
+    camera_sources, cap
 )
 from backend.core.camera_manager import detect_cameras
-from backend.core.device_controller import test_esp8266_connection
-from backend.core.video_processor import generate_frames
+from backend.core.device_controller import (
+    test_esp8266_connection, get_dispatcher_stats, get_reconciler_stats, get_transport_stats,
+    get_gesture_stats, get_level_stats, gesture_rules_affected, reload_gesture_rules, set_device_states, device_reconciler
+)
+from backend.core.command_dispatcher import DEVICE_OUTPUTS
+from backend.core.video_processor import generate_frames, get_pipeline_stats, adaptive_controller
+from backend.core.station_monitor import sync_stations, get_station_stats
+from backend.core.stream_tiers import resolve_tier, parse_size, limit_send_buffer
+from backend.core import startup
+
+# Reported by GET /api/settings but never written back from a POST
+READ_ONLY_SETTINGS = ("adaptive_status",)
+
+def settings_snapshot():
+    """Settings plus the adaptive controller's current decisions"""
+    return {**settings, "adaptive_status": adaptive_controller.status()}
 
 def register_routes(app, socketio):
     """Register all API routes with the Flask app"""
@@ -43,32 +56,59 @@ def register_routes(app, socketio):
         if request.method == 'POST':
             old_camera_source = settings.get("camera_source")
             
-            settings.update(request.json)
+            # The dashboard posts the whole settings object back, including read-only
+            # status and values the adaptive controller currently owns
+            update = {k: v for k, v in request.json.items() if k not in READ_ONLY_SETTINGS}
+            update = adaptive_controller.filter_update(update)
+            
+            # Recompile gesture rules before applying, so bad rules are rejected as a whole
+            if gesture_rules_affected(update):
+                try:
+                    reload_gesture_rules(update.get("gesture_rules", settings.get("gesture_rules")),
+                                         {**settings, **update})
+                except ValueError as e:
+                    return jsonify({"status": "error", "message": f"Invalid gesture rules: {e}"}), 400
+            settings.update(update)
+            
+            # A camera can only be opened once: stop the station that owns the new
+            # dashboard camera, and monitor the previous one if it is a station
+            if settings.get("camera_source") != old_camera_source or "stations" in update:
+                sync_stations()
             
             last_settings_change = time.time()
             
-            print(f"Settings updated: {', '.join(request.json.keys())}")
+            print(f"Settings updated: {', '.join(update.keys())}")
             
-            return jsonify({"status": "success", "settings": settings})
-        return jsonify(settings)
+            return jsonify({"status": "success", "settings": settings_snapshot()})
+        return jsonify(settings_snapshot())
     
     # Device control routes
     @app.route('/api/device/<device>/<action>', methods=['POST'])
     def control_device(device, action):
+        """Queue a device state; 202 right away, the reconciler delivers and confirms it
+        
+        Goes through the same outputs as gestures: "motor" switches the motor
+        and the buzzer together (see DEVICE_OUTPUTS), so a later reconciler
+        correction never disagrees with a manual switch.
+        """
         if device not in device_status:
             return jsonify({"success": False, "message": f"Unknown device: {device}"})
+        if action not in ("on", "off"):
+            return jsonify({"success": False, "message": f"Unknown action: {action}"})
             
         try:
-            esp_ip = get_esp8266_ip()
-            response = requests.get(f'http://{esp_ip}/{device}/{action}', timeout=0.5)
+            set_device_states({device: "ON" if action == "on" else "OFF"})
             
-            device_status[device] = "ON" if action == "on" else "OFF"
-                
+            # The dashboard picks up the confirmed state from the device_status updates
+            reconciler = device_reconciler.stats()
             return jsonify({
                 "success": True,
                 "device": device,
+                "outputs": DEVICE_OUTPUTS.get(device, [device]),
+                "desired": reconciler["desired"].get(device),
+                "reported": reconciler["reported"].get(device),
                 "status": device_status[device]
-            })
+            }), 202
                 
         except Exception as e:
             print(f"Error controlling {device}: {e}")
@@ -78,6 +118,31 @@ def register_routes(app, socketio):
     def get_device_status():
         return jsonify(device_status)
     
+    @app.route('/api/device/dispatcher', methods=['GET'])
+    def device_dispatcher_stats():
+        """Queued commands, coalescing and command latency"""
+        return jsonify(get_dispatcher_stats())
+    
+    @app.route('/api/device/transport', methods=['GET'])
+    def device_transport_stats():
+        """Connection health and per-endpoint latency histograms"""
+        return jsonify(get_transport_stats())
+    
+    @app.route('/api/device/reconciler', methods=['GET'])
+    def device_reconciler_stats():
+        """Desired vs. reported device state and polling counters"""
+        return jsonify(get_reconciler_stats())
+    
+    @app.route('/api/device/levels', methods=['GET'])
+    def device_level_stats():
+        """Continuous control levels, rate limiting and coalescing counters"""
+        return jsonify(get_level_stats())
+    
+    @app.route('/api/gesture/stats', methods=['GET'])
+    def gesture_stats():
+        """Active gesture, confirmation thresholds and decision latency"""
+        return jsonify(get_gesture_stats())
+    
     # Network settings update and restart
     @app.route('/api/network/settings', methods=['POST'])
     def update_network_settings():
@@ -183,11 +248,40 @@ def register_routes(app, socketio):
         
         return jsonify({"success": False, "message": "Invalid test type"})
     
+    @app.route('/api/health', methods=['GET'])
+    def health():
+        """Readiness of the background-loaded resources; 503 until the required ones are up"""
+        status = startup.health()
+        return jsonify(status), 200 if status["ready"] else 503
+    
+    @app.route('/api/pipeline/stats', methods=['GET'])
+    def pipeline_stats():
+        """Per-stage timing, queue depth and drop counters of the video pipeline"""
+        return jsonify(get_pipeline_stats())
+    
+    @app.route('/api/stations', methods=['GET', 'POST'])
+    def handle_stations():
+        """Detection-only monitors for extra camera sources and their worker pool"""
+        if request.method == 'POST':
+            names = request.json.get("stations", [])
+            if not isinstance(names, list):
+                return jsonify({"success": False, "message": "stations must be a list of camera names"})
+            settings["stations"] = names
+            sync_stations()
+        return jsonify(get_station_stats())
+    
     # Video streaming route
     @app.route('/video_feed')
     def video_feed():
-        """Video streaming route."""
+        """Video streaming route.
+        
+        Optional query parameters: quality (JPEG 1-100), size (width, or WxH)
+        and fps; quality and size snap to the shared encode tiers.
+        """
+        tier = resolve_tier(request.args.get('quality', type=int),
+                            parse_size(request.args.get('size')))
+        limit_send_buffer(request.environ)
         return Response(
-            generate_frames(),
+            generate_frames(tier, max_fps=request.args.get('fps', type=float)),
             mimetype='multipart/x-mixed-replace; boundary=frame'
         )
\ No newline at end of file
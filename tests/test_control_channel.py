@@ -0,0 +1,39 @@
+import itertools
+
+import pytest
+
+from backend.core.control_channel import (FRAME, MAGIC, OUTPUT_BITS, TYPE_ACK, TYPE_LEVEL, TYPE_SET, TYPE_STATUS,
+                                          VERSION, bits_to_states, decode_frame, encode_frame, states_to_bits)
+
+@pytest.mark.parametrize("frame_type", [TYPE_SET, TYPE_STATUS, TYPE_LEVEL, TYPE_SET | TYPE_ACK])
+@pytest.mark.parametrize("seq", [0, 1, 0x1234, 0xFFFF])
+def test_encode_decode_round_trip(frame_type, seq):
+    data = encode_frame(frame_type, seq, 0x0F, 100)
+    assert len(data) == FRAME.size == 8
+    assert data[:3] == MAGIC + bytes([VERSION])
+    assert decode_frame(data) == (frame_type, seq, 0x0F, 100)
+
+def test_seq_and_args_wrap():
+    assert decode_frame(encode_frame(TYPE_SET, 0x10001, 0x1FF, 0x100)) == (TYPE_SET, 1, 0xFF, 0)
+
+@pytest.mark.parametrize("data", [
+    b"",
+    encode_frame(TYPE_SET, 1)[:-1],
+    encode_frame(TYPE_SET, 1) + b"\x00",
+    b"XX" + encode_frame(TYPE_SET, 1)[2:],
+    MAGIC + bytes([VERSION + 1]) + encode_frame(TYPE_SET, 1)[3:],
+])
+def test_decode_rejects_invalid_frames(data):
+    assert decode_frame(data) is None
+
+def test_motor_drives_motor_and_buzzer_bits():
+    assert states_to_bits({"motor": "ON"}) == (OUTPUT_BITS["motor"] | OUTPUT_BITS["buzzer"],) * 2
+    assert states_to_bits({"motor": "OFF"}) == (OUTPUT_BITS["motor"] | OUTPUT_BITS["buzzer"], 0)
+    assert bits_to_states(OUTPUT_BITS["buzzer"])["motor"] == "ON"
+
+def test_states_bits_round_trip():
+    for led1, led2, motor in itertools.product(("ON", "OFF"), repeat=3):
+        states = {"led1": led1, "led2": led2, "motor": motor}
+        mask, values = states_to_bits(states)
+        assert mask == 0x0F
+        assert bits_to_states(values) == states
@@ -0,0 +1,70 @@
+import pytest
+
+from backend.config import GESTURE_RULES
+from backend.core.gesture_rules import FINGER_MASKS, compile_rules, fingers_mask
+
+ALL_FLAGS = {"detect_led1": True, "detect_led2": True, "detect_motor": True}
+
+def legacy_states(count, desired):
+    """The if/elif on finger count that the default rules replaced"""
+    if count == 0:
+        return {"led1": "OFF", "led2": "OFF", "motor": "OFF"}
+    if count == 5:
+        return {"led1": "ON", "led2": "ON", "motor": "OFF"}
+    if count == 1:
+        return {"led1": "OFF" if desired["led1"] == "ON" else "ON"}
+    if count == 2:
+        return {"led2": "OFF" if desired["led2"] == "ON" else "ON"}
+    if count == 3:
+        return {"motor": "ON", "led1": "OFF", "led2": "OFF"}
+    return {"motor": "OFF"}
+
+def mask_fingers(mask):
+    return [(mask >> bit) & 1 for bit in range(5)]
+
+@pytest.mark.parametrize("rules, message", [
+    ({"fingers": 1}, "must be a list"),
+    (["fist"], "must be an object"),
+    ([{"fingers": 1, "mask": "01000"}], "not both"),
+    ([{"mask": "0100"}], "mask must be"),
+    ([{"mask": "01z00"}], "mask must be"),
+    ([{"fingers": 6}], "fingers must be"),
+    ([{"fingers": -1}], "fingers must be"),
+    ([{"fingers": "two"}], "fingers must be"),
+    ([{"fingers": 1, "set": {"lamp": "ON"}}], "unknown device"),
+    ([{"fingers": 1, "set": {"led1": "BLINK"}}], "must be one of"),
+])
+def test_invalid_rules_raise(rules, message):
+    with pytest.raises(ValueError, match=message):
+        compile_rules(rules, ALL_FLAGS)
+
+def test_fingers_mask_bit_order():
+    assert fingers_mask([1, 0, 0, 0, 0]) == 0b00001
+    assert fingers_mask([0, 1, 1, 0, 0]) == 0b00110
+    assert fingers_mask([1, 1, 1, 1, 1]) == FINGER_MASKS - 1
+
+def test_default_rules_match_legacy_mapping_for_every_mask():
+    table = compile_rules(GESTURE_RULES, ALL_FLAGS)
+    for mask in range(FINGER_MASKS):
+        fingers = mask_fingers(mask)
+        count = sum(fingers)
+        rule = table.rule(table.lookup(fingers))
+        assert rule is not None and rule.enabled, mask
+        for led1 in ("ON", "OFF"):
+            for led2 in ("ON", "OFF"):
+                desired = {"led1": led1, "led2": led2, "motor": "OFF"}
+                assert rule.target_states(desired.get) == legacy_states(count, desired), (mask, desired)
+
+def test_requires_flag_disables_rule_without_falling_through():
+    table = compile_rules(GESTURE_RULES, {**ALL_FLAGS, "detect_motor": False})
+    rule = table.rule(table.lookup([0, 1, 1, 1, 0]))
+    assert rule.fixed.get("motor") == "ON"
+    assert not rule.enabled
+
+def test_mask_rule_wins_over_later_count_rule():
+    rules = [{"mask": "01100", "set": {"led2": "ON"}}, {"fingers": 2, "set": {"led1": "ON"}}]
+    table = compile_rules(rules, ALL_FLAGS)
+    assert table.lookup([0, 1, 1, 0, 0]) == 0
+    assert table.lookup([0, 1, 0, 0, 1]) == 1
+    assert table.lookup([0, 0, 0, 0, 0]) == len(table.rules)
+    assert table.rule(len(table.rules)) is None
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from backend.core.hand_features import compute_hand_features, hand_angles, landmarks_to_array
+from tools.bench_landmark_filter import base_pose
+from tools.bench_landmarks import HEIGHT, WIDTH, legacy_math, synthetic_hands
+
+def test_matches_legacy_math():
+    for hand in synthetic_hands(200, seed=3):
+        points = [(int(lm.x * WIDTH), int(lm.y * HEIGHT)) for lm in hand.landmark]
+        landmarks = np.array([(x, y, 0) for x, y in points], dtype=np.float32)
+        for label in ("Right", "Left"):
+            fingers, finger_angle, hand_angle = compute_hand_features(landmarks, label)
+            legacy_fingers, legacy_finger_angle, legacy_hand_angle = legacy_math(points, label)
+            assert fingers == legacy_fingers
+            assert finger_angle == pytest.approx(legacy_finger_angle, abs=0.05)
+            assert hand_angle == pytest.approx(legacy_hand_angle, abs=0.05)
+
+def test_landmarks_to_array_scales_to_pixels():
+    hand = synthetic_hands(1)[0]
+    landmarks = landmarks_to_array(hand, WIDTH, HEIGHT)
+    assert landmarks.shape == (21, 3) and landmarks.dtype == np.float32
+    assert landmarks[0, 0] == pytest.approx(hand.landmark[0].x * WIDTH, rel=1e-5)
+    assert landmarks[0, 1] == pytest.approx(hand.landmark[0].y * HEIGHT, rel=1e-5)
+
+def test_base_pose_fingers():
+    pose = base_pose()
+    assert compute_hand_features(pose, "Right")[0] == [0, 1, 1, 1, 1]
+    # Shifting the whole hand does not change the features
+    shifted = pose + np.float32([100, -50, 0])
+    assert compute_hand_features(shifted, "Right") == compute_hand_features(pose, "Right")
+
+def test_hand_angles_accepts_float64_and_lists():
+    pose = base_pose()
+    expected = hand_angles(pose)
+    assert hand_angles(pose.astype(np.float64)) == pytest.approx(expected)
+    assert hand_angles(pose.tolist()) == pytest.approx(expected)
+    assert all(0.0 <= angle <= 180.0 for angle in expected)
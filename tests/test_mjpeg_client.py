@@ -0,0 +1,81 @@
+import pytest
+
+from backend.core.mjpeg_client import MJPEGStreamReader
+
+BOUNDARY = b"123456789000000000000987654321"
+JPEGS = [b"\xff\xd8first\r\n--not a boundary\xff\xd9", b"\xff\xd8" + bytes(range(256)) * 4 + b"\xff\xd9", b"\xff\xd8x\xff\xd9"]
+
+class FakeSocket:
+    """Hands out scripted recv() chunks, then b"" for end of stream"""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def recv(self, size):
+        return self.chunks.pop(0) if self.chunks else b""
+
+    def close(self):
+        self.closed = True
+
+def multipart(jpegs, content_length=True):
+    body = b"garbage before the first part"
+    for jpeg in jpegs:
+        body += b"\r\n--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+        if content_length:
+            body += b"Content-Length: %d\r\n" % len(jpeg)
+        body += b"\r\n" + jpeg
+    if not content_length:
+        # The last part only ends at the next boundary
+        body += b"\r\n--" + BOUNDARY + b"\r\n"
+    return body
+
+def chunked(body, size):
+    encoded = b""
+    for start in range(0, len(body), size):
+        piece = body[start:start + size]
+        encoded += b"%x\r\n" % len(piece) + piece + b"\r\n"
+    return encoded + b"0\r\n\r\n"
+
+def split(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+def make_reader(chunks, is_chunked=False):
+    reader = MJPEGStreamReader("http://127.0.0.1:8181/stream")
+    reader._sock = FakeSocket(chunks)
+    reader._boundary = BOUNDARY
+    reader._chunked = is_chunked
+    return reader
+
+def read_all(reader):
+    parts = []
+    while True:
+        jpeg = reader.read_jpeg()
+        if jpeg is None:
+            return parts
+        parts.append(jpeg)
+
+@pytest.mark.parametrize("recv_size", [1, 2, 7, 31, 4096])
+@pytest.mark.parametrize("content_length", [True, False])
+def test_parts_survive_any_recv_split(recv_size, content_length):
+    reader = make_reader(split(multipart(JPEGS, content_length), recv_size))
+    assert read_all(reader) == JPEGS
+    assert reader.frames_read == len(JPEGS)
+
+@pytest.mark.parametrize("chunk_size, recv_size", [(5, 3), (64, 1), (1000, 17), (4096, 4096)])
+def test_chunked_transfer_encoding(chunk_size, recv_size):
+    reader = make_reader(split(chunked(multipart(JPEGS), chunk_size), recv_size), is_chunked=True)
+    assert read_all(reader) == JPEGS
+
+def test_truncated_part_returns_none():
+    data = multipart(JPEGS[:1])
+    reader = make_reader(split(data[:-3], 5))
+    assert reader.read_jpeg() is None
+
+def test_release_closes_socket():
+    reader = make_reader([])
+    sock = reader._sock
+    reader.release()
+    assert sock.closed
+    assert not reader.isOpened()
+    assert reader.read_jpeg() is None
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: per-frame OpenCV work with fresh arrays vs reused dst= buffers
+
+Runs the capture -> detect-input -> encode steps of the video pipeline
+(mirror, ESP32 brightness, downscale, BGR->RGB, JPEG + multipart chunk)
+both ways on the same frames and reports time per frame and the traced
+allocation high-water mark per frame.
+
+Usage:
+    python -m tools.bench_frame_loop [--frames 300] [--width 640] [--height 480]
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from backend.core.frame_buffers import BufferPool
+
+SCALE = 0.5
+
+# Mirrors video_processor (imported directly it would start MediaPipe and the device connection)
+CAPTURE_BUFFERS = 8
+
+def multipart_chunk(jpeg):
+    return b''.join((b'--frame\r\nContent-Type: image/jpeg\r\n\r\n', jpeg, b'\r\n'))
+
+def legacy_frame(view):
+    frame = cv2.flip(view, 1)
+    frame = cv2.convertScaleAbs(frame, alpha=1.05, beta=5)
+    height, width = frame.shape[:2]
+    small = cv2.resize(frame, (int(width * SCALE), int(height * SCALE)))
+    rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
+    chunk = (b'--frame\r\n'
+             b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+    return rgb, chunk
+
+def pooled_frame(view, pool):
+    frame = cv2.flip(view, 1, dst=pool.acquire("capture", view.shape, depth=CAPTURE_BUFFERS))
+    cv2.convertScaleAbs(frame, dst=frame, alpha=1.05, beta=5)
+    height, width = frame.shape[:2]
+    size = (int(width * SCALE), int(height * SCALE))
+    small = cv2.resize(frame, size, dst=pool.get("detect", (size[1], size[0], 3)))
+    rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=pool.get("rgb", small.shape))
+    ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
+    pool.release(frame)
+    return rgb, multipart_chunk(buffer)
+
+def run(func, frames, traced):
+    peaks = []
+    start = time.perf_counter()
+    for frame in frames:
+        if traced:
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        func(frame)
+        if traced:
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    elapsed = (time.perf_counter() - start) / len(frames) * 1000
+    return elapsed, (np.mean(peaks) / 1024 if peaks else None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame buffer reuse benchmark")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    # Smooth gradients plus noise, so the JPEG encoder does realistic work
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, args.width, dtype=np.float32)
+    y = np.linspace(0, 255, args.height, dtype=np.float32)[:, None]
+    base = np.dstack([x + 0 * y, y + 0 * x, (x + y) / 2]).astype(np.uint8)
+    frames = [cv2.add(base, rng.integers(0, 20, base.shape, dtype=np.uint8)) for _ in range(16)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    pool = BufferPool()
+    same = all(np.array_equal(legacy_frame(f)[0], pooled_frame(f, pool)[0]) for f in frames[:16])
+    print(f"Detector input identical: {same}")
+
+    # Alternate and keep the best round; single runs are noisy on a shared CPU
+    legacy_ms = pooled_ms = float("inf")
+    for _ in range(3):
+        legacy_ms = min(legacy_ms, run(legacy_frame, frames, traced=False)[0])
+        pooled_ms = min(pooled_ms, run(lambda f: pooled_frame(f, pool), frames, traced=False)[0])
+    tracemalloc.start()
+    _, legacy_kb = run(legacy_frame, frames, traced=True)
+    _, pooled_kb = run(lambda f: pooled_frame(f, pool), frames, traced=True)
+    tracemalloc.stop()
+
+    print(f"{'':<26}{'legacy':>10}{'pooled':>10}")
+    print(f"{'time (ms/frame)':<26}{legacy_ms:>10.2f}{pooled_ms:>10.2f}")
+    print(f"{'allocated peak (KB/frame)':<26}{legacy_kb:>10.0f}{pooled_kb:>10.0f}")
+    print(f"Pool: {pool.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: frame handoff to another process through a pickling queue vs FrameRing
+
+A producer pushes 640x480 BGR frames as fast as it can; a consumer process
+takes the newest frame, reads it (a mean, standing in for cvtColor) and
+reports end-to-end latency. The queue path pickles and copies every frame
+twice; the ring path writes the frame once into shared memory and the
+consumer reads it in place.
+
+Usage:
+    python -m tools.bench_frame_ring [--frames 600] [--width 640] [--height 480]
+"""
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from backend.core.frame_ring import FrameRing
+
+def queue_consumer(frames, results):
+    latencies = []
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+        sent, frame = item
+        frame.mean()
+        latencies.append(time.perf_counter() - sent)
+    results.put(latencies)
+
+def ring_consumer(spec, done, results):
+    ring = FrameRing(**spec)
+    latencies = []
+    last_seq = 0
+    while not done.is_set() or ring.latest_seq > last_seq:
+        borrowed = ring.acquire(0, last_seq)
+        if borrowed is None:
+            time.sleep(0.0005)
+            continue
+        last_seq, frame, sent = borrowed
+        frame.mean()
+        del frame, borrowed
+        ring.release(0)
+        latencies.append(time.perf_counter() - sent)
+    ring.close()
+    results.put(latencies)
+
+def summarize(name, latencies, elapsed, produced):
+    latencies = np.array(latencies) * 1000
+    print(f"{name:<8}{produced / elapsed:>10.0f}{len(latencies):>10}"
+          f"{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 90):>10.2f}")
+
+def run_queue(ctx, frames):
+    queue, results = ctx.Queue(maxsize=2), ctx.Queue()
+    consumer = ctx.Process(target=queue_consumer, args=(queue, results))
+    consumer.start()
+    start = time.perf_counter()
+    for frame in frames:
+        queue.put((time.perf_counter(), frame))
+    elapsed = time.perf_counter() - start
+    queue.put(None)
+    latencies = results.get()
+    consumer.join()
+    return latencies, elapsed
+
+def run_ring(ctx, frames):
+    ring = FrameRing(frames[0].shape, slots=3, readers=1)
+    done, results = ctx.Event(), ctx.Queue()
+    consumer = ctx.Process(target=ring_consumer, args=(ring.spec(), done, results))
+    consumer.start()
+    time.sleep(0.5)
+    start = time.perf_counter()
+    for frame in frames:
+        index, slot = ring.begin_write()
+        np.copyto(slot, frame)
+        ring.commit(index, time.perf_counter())
+    elapsed = time.perf_counter() - start
+    done.set()
+    latencies = results.get()
+    consumer.join()
+    del slot
+    ring.close()
+    return latencies, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Inter-process frame handoff benchmark")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pool = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [pool[i % len(pool)] for i in range(args.frames)]
+    ctx = multiprocessing.get_context("spawn")
+
+    print(f"{args.frames} frames of {args.width}x{args.height}x3")
+    print(f"{'':<8}{'fps in':>10}{'consumed':>10}{'p50 ms':>10}{'p90 ms':>10}")
+    latencies, elapsed = run_queue(ctx, frames)
+    summarize("queue", latencies, elapsed, len(frames))
+    latencies, elapsed = run_ring(ctx, frames)
+    summarize("ring", latencies, elapsed, len(frames))
+    print("The queue delivers every frame; the ring always hands over the newest one and skips the rest.")
+
+if __name__ == "__main__":
+    main()
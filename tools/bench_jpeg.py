@@ -0,0 +1,104 @@
+"""
+Benchmark: JPEG encoders on recorded frames at the stream's resolutions
+
+Encodes the same frames with every available backend/option combination
+from backend.core.jpeg_encoder and prints time and size per frame.
+turbojpeg rows only appear when PyTurboJPEG and libturbojpeg are installed.
+
+Usage:
+    python -m tools.bench_jpeg [--video recording.avi | --images frames_dir]
+                               [--sizes 320x240,640x480,800x600,1280x720] [--quality 85]
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from backend.core.jpeg_encoder import ENCODERS
+
+VARIANTS = [
+    ("opencv", "420", False),
+    ("opencv", "444", False),
+    ("turbojpeg", "420", True),
+    ("turbojpeg", "420", False),
+    ("turbojpeg", "444", True),
+]
+
+def load_frames(video=None, images=None, limit=60):
+    """Frames from a recording or an image folder; a synthetic scene if neither is given"""
+    frames = []
+    if video:
+        capture = cv2.VideoCapture(video)
+        while len(frames) < limit:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(frame)
+        capture.release()
+    elif images:
+        for name in sorted(os.listdir(images))[:limit]:
+            frame = cv2.imread(os.path.join(images, name))
+            if frame is not None:
+                frames.append(frame)
+    if frames:
+        return frames
+
+    # Gradient background, a few shapes and sensor noise: roughly camera-like for the encoder
+    rng = np.random.default_rng(0)
+    height, width = 720, 1280
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    base = np.dstack([180 * x + 40 * y, 120 + 60 * y + 0 * x, 200 - 100 * x * y]).astype(np.uint8)
+    for i in range(limit):
+        frame = base.copy()
+        cv2.circle(frame, (300 + 10 * i, 360), 120, (40, 90, 200), -1)
+        cv2.rectangle(frame, (800, 200 + 3 * i), (1000, 500), (230, 230, 230), -1)
+        cv2.putText(frame, f"frame {i}", (60, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+        frames.append(cv2.add(frame, rng.integers(0, 12, frame.shape, dtype=np.uint8)))
+    return frames
+
+def parse_sizes(text):
+    return [tuple(int(v) for v in size.split("x")) for size in text.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description="JPEG encoder benchmark")
+    parser.add_argument("--video", help="Recorded video to take frames from")
+    parser.add_argument("--images", help="Directory of recorded frames")
+    parser.add_argument("--sizes", default="320x240,640x480,800x600,1280x720")
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    source = load_frames(args.video, args.images)
+    print(f"{len(source)} frames from {args.video or args.images or 'synthetic scene'}, quality {args.quality}")
+
+    encoders = []
+    unavailable = set()
+    for name, subsampling, fast_dct in VARIANTS:
+        if name in unavailable:
+            continue
+        try:
+            encoder = ENCODERS[name](subsampling=subsampling, fast_dct=fast_dct)
+        except (ImportError, OSError, RuntimeError) as e:
+            print(f"  skipping {name}: {str(e).splitlines()[0]}")
+            unavailable.add(name)
+            continue
+        label = f"{name} {subsampling}" + (" fastdct" if encoder.fast_dct else "")
+        if label not in [existing for existing, _ in encoders]:
+            encoders.append((label, encoder))
+
+    print(f"{'size':<11}{'encoder':<24}{'ms/frame':>10}{'KB/frame':>10}")
+    for width, height in parse_sizes(args.sizes):
+        frames = [cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA) for frame in source]
+        for label, encoder in encoders:
+            best = float("inf")
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                sizes = [len(encoder.encode(frame, args.quality)) for frame in frames]
+                best = min(best, (time.perf_counter() - start) / len(frames) * 1000)
+            print(f"{f'{width}x{height}':<11}{label:<24}{best:>10.2f}{np.mean(sizes) / 1024:>10.1f}")
+
+if __name__ == "__main__":
+    main()
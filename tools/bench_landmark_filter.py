@@ -0,0 +1,108 @@
+"""
+Benchmark: landmark jitter, finger flips and skipped-frame prediction with LandmarkFilter
+
+A synthetic hand (4 fingers up, the ring finger just above the raise
+threshold) holds still, sweeps sideways and holds again while Gaussian
+noise is added to every landmark, roughly like MediaPipe at low resolution.
+For each detection rate it prints how often the finger count flips and the
+landmark error against the true pose, raw vs filtered, then compares
+holding the last landmarks with extrapolating them on frames skipped by
+skip_frames.
+
+Usage:
+    python -m tools.bench_landmark_filter [--fps 8,15,30] [--noise 3.0] [--skip 2]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.core.hand_features import compute_hand_features
+from backend.core.landmark_filter import LandmarkFilter
+
+def base_pose():
+    """(21, 3) right hand at processing resolution: thumb in, four fingers raised"""
+    pose = np.zeros((21, 3), dtype=np.float32)
+    pose[0] = (160, 220, 0)
+    pose[1:5] = [(175, 205, 0), (182, 190, 0), (178, 178, 0), (186, 172, 0)]   # thumb folded
+    for finger, x in enumerate((140, 155, 170, 185)):
+        mcp, pip, dip, tip = (5 + 4 * finger, 6 + 4 * finger, 7 + 4 * finger, 8 + 4 * finger)
+        rise = 17 if finger == 2 else 40     # ring finger barely counts as raised
+        pose[mcp] = (x, 170, 0)
+        pose[pip] = (x, 150, 0)
+        pose[dip] = (x, 150 - rise * 0.5, 0)
+        pose[tip] = (x, 150 - rise, 0)
+    return pose
+
+def trajectory(t):
+    """Horizontal offset: hold 1 s, sweep 120 px in 0.5 s, hold 1.5 s"""
+    return np.interp(t, [0.0, 1.0, 1.5, 3.0], [0.0, 0.0, 120.0, 120.0])
+
+def run(fps, noise, min_cutoff, beta, seed=0):
+    rng = np.random.default_rng(seed)
+    pose = base_pose()
+    truth_count = sum(compute_hand_features(pose, "Right")[0])
+    landmark_filter = LandmarkFilter(min_cutoff=min_cutoff, beta=beta)
+    results = {"raw": [0, [], None], "filtered": [0, [], None]}
+    elapsed = 0.0
+    for t in np.arange(0.0, 3.0, 1.0 / fps):
+        truth = pose.copy()
+        truth[:, 0] += trajectory(t)
+        raw = truth + rng.normal(0.0, noise, truth.shape).astype(np.float32)
+        start = time.perf_counter()
+        filtered = landmark_filter.filter(raw, t)
+        elapsed += time.perf_counter() - start
+        for name, landmarks in (("raw", raw), ("filtered", filtered)):
+            count = sum(compute_hand_features(landmarks, "Right")[0])
+            entry = results[name]
+            entry[0] += int(entry[2] is not None and count != entry[2])
+            entry[1].append(float(np.sqrt(((landmarks[:, :2] - truth[:, :2]) ** 2).mean())))
+            entry[2] = count
+    frames = int(round(3.0 * fps))
+    return truth_count, results, elapsed / frames * 1e6
+
+def run_prediction(fps, skip, noise, min_cutoff, beta, seed=1):
+    """Landmark error on skipped frames: hold last vs extrapolate"""
+    rng = np.random.default_rng(seed)
+    pose = base_pose()
+    landmark_filter = LandmarkFilter(min_cutoff=min_cutoff, beta=beta)
+    held = None
+    hold_error, predict_error = [], []
+    for index, t in enumerate(np.arange(0.0, 3.0, 1.0 / fps)):
+        truth = pose.copy()
+        truth[:, 0] += trajectory(t)
+        if index % skip == 0:
+            raw = truth + rng.normal(0.0, noise, truth.shape).astype(np.float32)
+            held = landmark_filter.filter(raw, t)
+            continue
+        predicted = landmark_filter.predict(t)
+        hold_error.append(float(np.abs(held[:, :2] - truth[:, :2]).mean()))
+        predict_error.append(float(np.abs(predicted[:, :2] - truth[:, :2]).mean()))
+    return np.mean(hold_error), np.mean(predict_error), np.max(hold_error), np.max(predict_error)
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark filter benchmark")
+    parser.add_argument("--fps", default="8,15,30")
+    parser.add_argument("--noise", type=float, default=3.0, help="Landmark noise sigma in pixels")
+    parser.add_argument("--skip", type=int, default=2, help="skip_frames for the prediction check")
+    parser.add_argument("--min-cutoff", type=float, default=0.5)
+    parser.add_argument("--beta", type=float, default=0.02)
+    args = parser.parse_args()
+
+    print(f"noise sigma {args.noise} px, min_cutoff {args.min_cutoff} Hz, beta {args.beta}")
+    print(f"{'fps':>5}{'':>3}{'flips raw':>10}{'flips filt':>11}{'rms raw':>9}{'rms filt':>9}{'us/call':>9}")
+    for fps in [float(v) for v in args.fps.split(",")]:
+        truth_count, results, micros = run(fps, args.noise, args.min_cutoff, args.beta)
+        raw, filtered = results["raw"], results["filtered"]
+        print(f"{fps:>5.0f}{'':>3}{raw[0]:>10}{filtered[0]:>11}"
+              f"{np.mean(raw[1]):>9.2f}{np.mean(filtered[1]):>9.2f}{micros:>9.1f}")
+    print(f"(true finger count {truth_count} throughout)")
+
+    print(f"\nSkipped frames at 30 fps, skip_frames={args.skip}: mean / max landmark error in px")
+    hold_mean, predict_mean, hold_max, predict_max = run_prediction(
+        30.0, args.skip, args.noise, args.min_cutoff, args.beta)
+    print(f"  hold last   {hold_mean:6.2f} / {hold_max:6.2f}")
+    print(f"  extrapolate {predict_mean:6.2f} / {predict_max:6.2f}")
+
+if __name__ == "__main__":
+    main()
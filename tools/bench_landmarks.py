@@ -0,0 +1,141 @@
+"""
+Micro-benchmark: per-landmark Python math vs the vectorized hand_features path
+
+Runs both implementations on the same synthetic MediaPipe-style landmark
+lists, checks that they agree, and prints per-call timings for feature
+extraction and landmark rescaling.
+
+Usage:
+    python -m tools.bench_landmarks [--iterations 20000]
+"""
+import argparse
+import math
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from backend.core.hand_features import compute_hand_features, landmarks_to_array, landmarks_to_points
+
+WIDTH, HEIGHT = 320, 240
+
+# --- Previous implementation (gesture_detector before vectorization) ---
+
+def legacy_angle(a, b, c):
+    a, b, c = np.array(a), np.array(b), np.array(c)
+    ab = b - a
+    cb = b - c
+    magnitude = np.linalg.norm(ab) * np.linalg.norm(cb)
+    if magnitude < 1e-10:
+        return 0
+    return np.degrees(np.arccos(np.clip(np.dot(ab, cb) / magnitude, -1.0, 1.0)))
+
+def legacy_wrist_rotation(landmarks):
+    wrist, index_mcp, pinky_mcp = landmarks[0], landmarks[5], landmarks[17]
+    vector_x = (index_mcp[0] + pinky_mcp[0]) / 2 - wrist[0]
+    vector_y = (index_mcp[1] + pinky_mcp[1]) / 2 - wrist[1]
+    angle = (math.degrees(math.atan2(vector_y, vector_x)) + 360) % 360
+    return 360 - angle if angle > 180 else angle
+
+def legacy_fingers(landmarks, hand_label):
+    fingers = [0] * 5
+    thumb_angle = legacy_angle(landmarks[2], landmarks[3], landmarks[4])
+    if hand_label == "Right":
+        fingers[0] = int(landmarks[4][0] < landmarks[3][0] and thumb_angle > 30)
+    else:
+        fingers[0] = int(landmarks[4][0] > landmarks[3][0] and thumb_angle > 30)
+    for i in range(1, 5):
+        tip, dip, pip, mcp = i * 4 + 4, i * 4 + 3, i * 4 + 2, i * 4 + 1
+        if (landmarks[tip][1] < landmarks[pip][1] and
+                landmarks[dip][1] < landmarks[mcp][1] and
+                (landmarks[pip][1] - landmarks[tip][1]) > 15):
+            fingers[i] = 1
+    return fingers
+
+def legacy_extract(hand_landmarks, hand_label):
+    landmarks = [(int(lm.x * WIDTH), int(lm.y * HEIGHT)) for lm in hand_landmarks.landmark]
+    fingers = legacy_fingers(landmarks, hand_label)
+    finger_angle = legacy_angle(landmarks[8], landmarks[0], landmarks[4])
+    return landmarks, fingers, finger_angle, legacy_wrist_rotation(landmarks)
+
+def legacy_math(landmarks, hand_label):
+    fingers = legacy_fingers(landmarks, hand_label)
+    return fingers, legacy_angle(landmarks[8], landmarks[0], landmarks[4]), legacy_wrist_rotation(landmarks)
+
+def legacy_rescale(landmarks, scale_factor):
+    return [[int(x * scale_factor), int(y * scale_factor)] for x, y in landmarks]
+
+# --- Vectorized implementation ---
+
+def vector_extract(hand_landmarks, hand_label):
+    landmarks = landmarks_to_array(hand_landmarks, WIDTH, HEIGHT)
+    fingers, finger_angle, hand_angle = compute_hand_features(landmarks, hand_label)
+    return landmarks, fingers, finger_angle, hand_angle
+
+def vector_rescale(landmarks, scale_factor):
+    landmarks = landmarks * scale_factor
+    return landmarks_to_points(landmarks)
+
+# --- Harness ---
+
+def synthetic_hands(count, seed=0):
+    """Plausible hands: a wrist near the bottom with fingers fanned upward"""
+    rng = np.random.default_rng(seed)
+    hands = []
+    for _ in range(count):
+        base = rng.uniform([0.3, 0.6], [0.7, 0.9])
+        points = base + rng.normal(0, 0.12, size=(21, 2)) * [1.0, -1.0]
+        points[0] = base
+        z = rng.normal(0, 0.05, size=21)
+        hands.append(SimpleNamespace(landmark=[
+            SimpleNamespace(x=float(x), y=float(y), z=float(d)) for (x, y), d in zip(points, z)
+        ]))
+    return hands
+
+def time_calls(func, inputs, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(*inputs[i % len(inputs)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark feature extraction benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    hands = synthetic_hands(256)
+    labels = ["Right", "Left"]
+    inputs = [(hand, labels[i % 2]) for i, hand in enumerate(hands)]
+
+    # Same finger states; angles agree to within the old int() truncation
+    mismatches = 0
+    for hand, label in inputs:
+        _, old_fingers, old_finger_angle, old_hand_angle = legacy_extract(hand, label)
+        _, new_fingers, new_finger_angle, new_hand_angle = vector_extract(hand, label)
+        if (old_fingers != new_fingers or abs(old_finger_angle - new_finger_angle) > 5
+                or abs(old_hand_angle - new_hand_angle) > 5):
+            mismatches += 1
+    print(f"Agreement: {len(inputs) - mismatches}/{len(inputs)} hands "
+          f"(differences are joints within a pixel of a threshold, from the old int() truncation)")
+
+    old_extract = time_calls(legacy_extract, inputs, args.iterations)
+    new_extract = time_calls(vector_extract, inputs, args.iterations)
+
+    old_landmarks = [(legacy_extract(h, l)[0], l) for h, l in inputs]
+    new_landmarks = [(vector_extract(h, l)[0], l) for h, l in inputs]
+    old_math = time_calls(legacy_math, old_landmarks, args.iterations)
+    new_math = time_calls(compute_hand_features, new_landmarks, args.iterations)
+
+    old_points = [(points, 2.0) for points, _ in old_landmarks]
+    new_points = [(points, 2.0) for points, _ in new_landmarks]
+    old_rescale = time_calls(legacy_rescale, old_points, args.iterations)
+    new_rescale = time_calls(vector_rescale, new_points, args.iterations)
+
+    print(f"{'':<22}{'legacy':>10}{'vectorized':>12}{'speedup':>10}")
+    for name, old, new in (("features (us/call)", old_extract, new_extract),
+                           ("  math only", old_math, new_math),
+                           ("rescale (us/call)", old_rescale, new_rescale)):
+        print(f"{name:<22}{old:>10.1f}{new:>12.1f}{old / new:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
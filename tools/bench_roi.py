@@ -0,0 +1,122 @@
+"""
+Measure ROI tracking: hit rate, landmark accuracy and detection time vs full-frame detection
+
+Reads frames from a video file, camera index or MJPEG URL and runs two
+detectors on every frame at the same processing scale:
+
+- reference: full-frame MediaPipe in tracking mode, like the pipeline with
+  roi_tracking off
+- roi: the pipeline's ROI path, a crop around the predicted hand window on
+  a static_image_mode model, falling back to a full-frame tracking model
+  when the crop misses
+
+It prints how often the crop found the hand, how often either side found a
+hand the other did not, the landmark error of ROI results against the
+reference (pixels at frame resolution), and the time per detection.
+
+Usage:
+    python -m tools.bench_roi --source recording.mp4 [--frames 300] [--scale 0.5]
+    python -m tools.bench_roi --source http://127.0.0.1:8181/stream
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from backend.config import HANDS_OPTIONS
+from backend.core.hand_features import landmarks_to_array
+from backend.core.roi_tracker import RoiTracker
+
+def open_source(source):
+    return cv2.VideoCapture(int(source) if source.isdigit() else source)
+
+def run_hands(model, image, scale=1.0, offset=(0, 0)):
+    """(21, 3) landmarks in frame pixels, or None"""
+    if scale < 1.0:
+        height, width = image.shape[:2]
+        image = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))))
+    results = model.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    if not results.multi_hand_landmarks:
+        return None
+    height, width = image.shape[:2]
+    landmarks = landmarks_to_array(results.multi_hand_landmarks[0], width, height)
+    if scale < 1.0:
+        landmarks *= 1.0 / scale
+    landmarks[:, 0] += offset[0]
+    landmarks[:, 1] += offset[1]
+    return landmarks
+
+def summary(values):
+    if not values:
+        return "-"
+    return f"mean {np.mean(values):6.2f}  p90 {np.percentile(values, 90):6.2f}"
+
+def main():
+    parser = argparse.ArgumentParser(description="ROI tracking accuracy benchmark")
+    parser.add_argument("--source", required=True, help="Video file, camera index or stream URL")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--scale", type=float, default=0.5, help="processing_scale")
+    args = parser.parse_args()
+
+    import mediapipe as mp
+    reference_hands = mp.solutions.hands.Hands(**HANDS_OPTIONS)
+    full_hands = mp.solutions.hands.Hands(**HANDS_OPTIONS)
+    crop_hands = mp.solutions.hands.Hands(**{**HANDS_OPTIONS, "static_image_mode": True})
+    tracker = RoiTracker()
+
+    capture = open_source(args.source)
+    counts = {"frames": 0, "reference": 0, "roi": 0, "roi_only": 0, "reference_only": 0}
+    errors, reference_ms, crop_ms, fallback_ms = [], [], [], []
+    for index in range(args.frames):
+        ok, frame = capture.read()
+        if not ok:
+            break
+        counts["frames"] += 1
+        height, width = frame.shape[:2]
+
+        start = time.perf_counter()
+        reference = run_hands(reference_hands, frame, args.scale)
+        reference_ms.append((time.perf_counter() - start) * 1000)
+
+        window = tracker.predict(index, width, height)
+        landmarks = None
+        if window is not None:
+            start = time.perf_counter()
+            crop, crop_scale = tracker.crop(frame, window)
+            landmarks = run_hands(crop_hands, crop, crop_scale, window[:2])
+            crop_ms.append((time.perf_counter() - start) * 1000)
+            if landmarks is None:
+                tracker.lost(from_roi=True)
+        roi_hit = landmarks is not None
+        if landmarks is None:
+            start = time.perf_counter()
+            landmarks = run_hands(full_hands, frame, args.scale)
+            fallback_ms.append((time.perf_counter() - start) * 1000)
+        if landmarks is not None:
+            tracker.update(landmarks, index, hit=roi_hit)
+        else:
+            tracker.lost()
+
+        counts["reference"] += reference is not None
+        counts["roi"] += landmarks is not None
+        if reference is not None and landmarks is not None:
+            errors.append(float(np.linalg.norm(landmarks[:, :2] - reference[:, :2], axis=1).mean()))
+        elif landmarks is not None:
+            counts["roi_only"] += 1
+        elif reference is not None:
+            counts["reference_only"] += 1
+    capture.release()
+
+    stats = tracker.stats()
+    print(f"{counts['frames']} frames from {args.source} at scale {args.scale}")
+    print(f"hand found: reference {counts['reference']}, roi path {counts['roi']} "
+          f"(roi only {counts['roi_only']}, reference only {counts['reference_only']})")
+    print(f"crop attempts {stats['attempts']}, hits {stats['hits']}, hit rate {stats['hit_rate']}, "
+          f"fallbacks {stats['fallbacks']}")
+    print(f"landmark error vs reference (px): {summary(errors)}")
+    print(f"ms per detection: reference {summary(reference_ms)} | crop {summary(crop_ms)} "
+          f"| full-frame fallback {summary(fallback_ms)}")
+
+if __name__ == "__main__":
+    main()
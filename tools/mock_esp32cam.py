@@ -0,0 +1,94 @@
+"""
+Local stand-in for the ESP32-CAM stream server
+
+Serves recorded JPEGs (or generated test frames) as a chunked
+multipart/x-mixed-replace stream on /stream, framed the same way as
+arduino/CameraWebServer/app_httpd.cpp.
+
+Usage:
+    python -m tools.mock_esp32cam [--port 81] [--fps 20] [--frames DIR]
+Then set the ESP32-CAM URL to http://127.0.0.1:<port>/stream
+"""
+import argparse
+import glob
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+PART_BOUNDARY = "123456789000000000000987654321"
+
+def load_frames(frames_dir):
+    """Load recorded JPEGs, or render numbered test frames if none are given"""
+    frames = []
+    if frames_dir:
+        for path in sorted(glob.glob(os.path.join(frames_dir, "*.jpg"))):
+            with open(path, "rb") as f:
+                frames.append(f.read())
+    if not frames:
+        for i in range(30):
+            img = np.zeros((480, 640, 3), dtype=np.uint8)
+            cv2.rectangle(img, (20 * i, 200), (20 * i + 60, 280), (0, 200, 255), -1)
+            cv2.putText(img, f"Frame {i}", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+            ok, buffer = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
+            frames.append(buffer.tobytes())
+    return frames
+
+def make_handler(frames, fps):
+    class StreamHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_chunk(self, data):
+            self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/stream":
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace;boundary={PART_BOUNDARY}")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+
+            index = 0
+            try:
+                while True:
+                    jpeg = frames[index % len(frames)]
+                    now = time.time()
+                    self._send_chunk(f"\r\n--{PART_BOUNDARY}\r\n".encode())
+                    self._send_chunk((f"Content-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n"
+                                      f"X-Timestamp: {int(now)}.{int((now % 1) * 1e6):06d}\r\n\r\n").encode())
+                    self._send_chunk(jpeg)
+                    self.wfile.flush()
+                    index += 1
+                    time.sleep(1.0 / fps)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return StreamHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="ESP32-CAM MJPEG stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=81)
+    parser.add_argument("--fps", type=float, default=20.0)
+    parser.add_argument("--frames", help="directory of recorded .jpg frames")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(frames, args.fps))
+    print(f"Serving {len(frames)} frames at http://{args.host}:{args.port}/stream ({args.fps} fps)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
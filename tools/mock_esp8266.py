@@ -0,0 +1,155 @@
+"""
+Local stand-in for the ESP8266 relay board
+
+Implements the HTTP endpoints of arduino/Esp8266/Esp8266.ino (/status,
+/batch, /pwm, /<device>/on|off, /<led>_toggle) and its UDP control channel,
+keeping the output states and PWM levels in memory. --drop-rate simulates lost
+requests/datagrams for testing reconciliation and retransmits.
+
+Usage:
+    python -m tools.mock_esp8266 [--port 8080] [--udp-port 4210] [--drop-rate 0.2]
+Then set the ESP8266 address to 127.0.0.1:<port> (and esp8266_udp_port to
+--udp-port if it is not 4210)
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from backend.core.control_channel import (
+    OUTPUT_BITS, TYPE_ACK, TYPE_LEVEL, TYPE_SET, TYPE_STATUS, decode_frame, encode_frame
+)
+
+OUTPUTS = ["led1", "led2", "buzzer", "motor"]
+
+class DeviceState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outputs = {name: False for name in OUTPUTS}
+        self.levels = {name: 0 for name in OUTPUTS}
+        self.requests = 0
+
+    def set(self, name, on):
+        with self.lock:
+            self.outputs[name] = on
+            self.levels[name] = 100 if on else 0
+
+    def set_level(self, name, level):
+        with self.lock:
+            self.levels[name] = max(0, min(100, level))
+            self.outputs[name] = self.levels[name] > 0
+
+    def status(self):
+        with self.lock:
+            return {
+                "status": "ESP8266 OK",
+                "led1": "ON" if self.outputs["led1"] else "OFF",
+                "led2": "ON" if self.outputs["led2"] else "OFF",
+                "motor": "ON" if self.outputs["motor"] or self.outputs["buzzer"] else "OFF",
+            }
+
+    def bits(self):
+        with self.lock:
+            return sum(bit for name, bit in OUTPUT_BITS.items() if self.outputs[name])
+
+def serve_udp(state, host, port, drop_rate):
+    """Answer SET/STATUS frames the way handleControlUdp() in the sketch does"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((host, port))
+    while True:
+        data, peer = sock.recvfrom(64)
+        frame = decode_frame(data)
+        if frame is None or random.random() < drop_rate:
+            continue
+        frame_type, seq, mask, values = frame
+        if frame_type == TYPE_SET:
+            for name, bit in OUTPUT_BITS.items():
+                if mask & bit:
+                    state.set(name, bool(values & bit))
+        elif frame_type == TYPE_LEVEL:
+            for name, bit in OUTPUT_BITS.items():
+                if mask & bit:
+                    state.set_level(name, values)
+        elif frame_type != TYPE_STATUS:
+            continue
+        state.requests += 1
+        sock.sendto(encode_frame(frame_type | TYPE_ACK, seq, state.bits()), peer)
+
+def make_handler(state, drop_rate):
+    class DeviceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, body, content_type="text/plain"):
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            state.requests += 1
+            parts = urlsplit(self.path)
+            path = parts.path.strip("/")
+
+            if path != "status" and random.random() < drop_rate:
+                # Simulate a request lost on the way to the board
+                self.close_connection = True
+                return
+
+            if path == "status":
+                self._reply(json.dumps(state.status()), "application/json")
+            elif path == "batch":
+                applied = []
+                for name, values in parse_qs(parts.query).items():
+                    if name in OUTPUTS and values[0] in ("on", "off"):
+                        state.set(name, values[0] == "on")
+                        applied.append(f"{name.upper()}={values[0].upper()}")
+                self._reply("Batch: " + " ".join(applied))
+            elif path == "pwm":
+                applied = []
+                for name, values in parse_qs(parts.query).items():
+                    if name in OUTPUTS and values[0].isdigit():
+                        state.set_level(name, int(values[0]))
+                        applied.append(f"{name}={state.levels[name]}")
+                self._reply("PWM: " + " ".join(applied))
+            elif path.endswith("_toggle") and path[:-7] in OUTPUTS:
+                name = path[:-7]
+                state.set(name, not state.outputs[name])
+                self._reply(f"{name.upper()} {'ON' if state.outputs[name] else 'OFF'}")
+            elif "/" in path and path.split("/")[0] in OUTPUTS and path.split("/")[1] in ("on", "off"):
+                name, action = path.split("/")
+                state.set(name, action == "on")
+                self._reply(f"{name.upper()} {action.upper()}")
+            else:
+                self.send_error(404)
+
+    return DeviceHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="ESP8266 relay board stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--udp-port", type=int, default=4210)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    state = DeviceState()
+    threading.Thread(target=serve_udp, args=(state, args.host, args.udp_port, args.drop_rate),
+                     daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state, args.drop_rate))
+    print(f"ESP8266 stand-in on http://{args.host}:{args.port}, UDP {args.udp_port} "
+          f"(drop rate {args.drop_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Replay: synthetic finger-count sequences through the gesture state machine
+
+Plays a scripted gesture sequence (hold 5, switch to 1, flicker, 0, ...)
+sampled at several detection rates with optional per-frame noise, and
+prints which gestures were confirmed and how long after the switch. With
+frame + time based confirmation the decision latency should be close at
+8 and 30 FPS, and single-frame flicker should not trigger anything.
+
+Usage:
+    python -m tools.replay_gestures [--fps 8,15,30] [--noise 0.1] [--confirm-frames 3]
+                                    [--confirm-ms 250] [--hysteresis 1]
+"""
+import argparse
+import random
+
+from backend.core.gesture_state import GestureStateMachine
+
+# (finger count, seconds held); a 1-frame blip is written as duration 0
+SCRIPT = [
+    (5, 1.5),
+    (1, 1.5),
+    (2, 0.0),
+    (1, 0.5),
+    (0, 1.5),
+    (3, 0.1),
+    (0, 0.5),
+    (3, 1.5),
+    (2, 1.5),
+]
+
+def frames_for(script, fps, noise, rng):
+    """(timestamp, finger count, scripted count) samples at the given rate"""
+    interval = 1.0 / fps
+    now = 0.0
+    for value, duration in script:
+        count = max(1, round(duration * fps))
+        for _ in range(count):
+            observed = value
+            if noise and rng.random() < noise:
+                observed = rng.randrange(6)
+            yield now, observed, value
+            now += interval
+
+def replay(fps, noise, confirm_frames, confirm_ms, hysteresis, seed=0):
+    rng = random.Random(seed)
+    machine = GestureStateMachine(confirm_frames, confirm_ms / 1000.0, hysteresis, retrigger_seconds=1.0)
+    decisions = []
+    switched_at, previous = 0.0, None
+    for now, observed, scripted in frames_for(SCRIPT, fps, noise, rng):
+        if scripted != previous:
+            switched_at, previous = now, scripted
+        gesture = machine.observe(observed, now)
+        if gesture is not None:
+            decisions.append((gesture, (now - switched_at) * 1000, gesture == scripted))
+    return decisions, machine.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description="Gesture state machine replay")
+    parser.add_argument("--fps", default="8,15,30")
+    parser.add_argument("--noise", type=float, default=0.1, help="Chance of a random finger count per frame")
+    parser.add_argument("--confirm-frames", type=int, default=3)
+    parser.add_argument("--confirm-ms", type=float, default=250)
+    parser.add_argument("--hysteresis", type=int, default=1)
+    args = parser.parse_args()
+
+    print("Script: " + ", ".join(f"{value}x{duration}s" for value, duration in SCRIPT))
+    for fps in [float(v) for v in args.fps.split(",")]:
+        decisions, stats = replay(fps, args.noise, args.confirm_frames, args.confirm_ms, args.hysteresis)
+        fired = " ".join(f"{g}@{ms:.0f}ms" + ("" if ok else "(!)") for g, ms, ok in decisions)
+        latency = stats["decision_latency"] or {}
+        print(f"{fps:>5.0f} fps  decisions: {fired or '-'}")
+        print(f"{'':>11}latency p50 {latency.get('p50_ms', 0):.0f} ms, p90 {latency.get('p90_ms', 0):.0f} ms, "
+              f"wrong {sum(1 for *_, ok in decisions if not ok)}")
+
+if __name__ == "__main__":
+    main()